@@ -0,0 +1,186 @@
+"""Асинхронный режим бота: опросы и отправки в одном потоке."""
+import asyncio
+import os
+import sys
+from contextlib import nullcontext
+from http import HTTPStatus
+
+import aiohttp
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from exceptions import (
+    SendMessageError,
+    ApiRequestException,
+    ApiServerError,
+    APIResponseError
+)
+from homework import (
+    API_BREAKER,
+    API_CONNECT_TIMEOUT,
+    API_READ_TIMEOUT,
+    ENDPOINT,
+    ERROR_SUPPRESS_WINDOW,
+    PRACTICUM_TOKEN,
+    RETRY_PERIOD,
+    TELEGRAM_CHAT_ID,
+    TELEGRAM_SUBSCRIBERS,
+    TELEGRAM_TOKEN,
+    check_response,
+    check_tokens,
+    decode_json,
+    logger,
+    make_messages
+)
+from incidents import ErrorSuppressor
+from tenants import Tenant, load_tenants
+
+ASYNC_CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', 100))
+
+
+async def get_api_answer_async(session, timestamp, headers):
+    """Асинхронно делает запрос к API-сервиса Яндекс.Практикум.
+
+    Запрос идет через тот же предохранитель API, что и в синхронном
+    режиме.
+    """
+    with API_BREAKER.guard() if API_BREAKER else nullcontext():
+        try:
+            async with session.get(
+                ENDPOINT, headers=headers, params={'from_date': timestamp}
+            ) as response:
+                if response.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                    raise ApiServerError(
+                        f'API вернул код ответа: {response.status}'
+                    )
+                if response.status != HTTPStatus.OK:
+                    raise APIResponseError(
+                        f'API вернул код ответа: {response.status}'
+                    )
+                return decode_json(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise ApiRequestException(f'Ошибка при запросе к API: {e}')
+
+
+async def send_to_chat_async(bot, chat_id, message):
+    """Асинхронно отправляет сообщение в Telegram-чат."""
+    try:
+        logger.debug('Бот отправляет сообщение: %s', message)
+        await bot.send_message(chat_id=chat_id, text=message)
+    except (
+        asyncio_helper.ApiException,
+        aiohttp.ClientError,
+        asyncio.TimeoutError
+    ) as e:
+        logger.error('Бот не смог отправить сообщение: %s', e)
+        raise SendMessageError(f'Бот не смог отправить сообщение: {e}')
+
+
+async def fan_out_async(bot, chat_ids, message):
+    """Одновременно отправляет сообщение во все чаты подписчиков.
+
+    Ошибка в одном чате не мешает остальным; SendMessageError
+    выбрасывается, только если сообщение не ушло ни в один чат.
+    """
+    results = await asyncio.gather(
+        *(send_to_chat_async(bot, chat_id, message) for chat_id in chat_ids),
+        return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors and len(errors) == len(results):
+        raise errors[0]
+
+
+async def poll_tenant_async(session, bot, tenant):
+    """Выполняет одну итерацию опроса API для ученика."""
+    try:
+        response = await get_api_answer_async(
+            session, tenant.from_date, tenant.headers
+        )
+        homeworks = check_response(response)
+
+        for homework, message in make_messages(homeworks, tenant.index):
+            if message != tenant.last_message:
+                await fan_out_async(bot, tenant.chat_ids, message)
+                tenant.last_message = message
+                logger.info('Бот отправил сообщение: %s', message)
+            if homework is not None:
+                tenant.index.record(homework)
+
+        tenant.from_date = response.get('current_date', tenant.from_date)
+        summary = tenant.errors.resolve()
+        if summary is not None:
+            await fan_out_async(bot, tenant.chat_ids, summary)
+
+    except SendMessageError as send_err:
+        logger.error('Ошибка отправки сообщения: %s', send_err)
+
+    except Exception as error:
+        await report_error_async(bot, tenant, error)
+
+
+async def report_error_async(bot, tenant, error):
+    """Пишет ошибку опроса в лог и сообщает о ней, если это не повтор."""
+    logger.error('Сбой в работе программы: %s', error)
+    message = tenant.errors.report(error)
+    if message is None:
+        return
+    try:
+        await fan_out_async(bot, tenant.chat_ids, message)
+    except SendMessageError as send_err:
+        logger.error('Ошибка отправки сообщения: %s', send_err)
+
+
+async def poll_all(session, bot, tenants, semaphore):
+    """Одновременно опрашивает всех учеников с ограничением параллелизма."""
+    async def poll(tenant):
+        async with semaphore:
+            await poll_tenant_async(session, bot, tenant)
+
+    await asyncio.gather(*(poll(tenant) for tenant in tenants))
+
+
+async def run_async(tenants, concurrency=ASYNC_CONCURRENCY):
+    """Опрашивает учеников раз в RETRY_PERIOD секунд."""
+    bot = AsyncTeleBot(token=TELEGRAM_TOKEN)
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=API_CONNECT_TIMEOUT, sock_read=API_READ_TIMEOUT
+    )
+    loop = asyncio.get_running_loop()
+    try:
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=timeout
+        ) as session:
+            while True:
+                started = loop.time()
+                await poll_all(session, bot, tenants, semaphore)
+                elapsed = loop.time() - started
+                logger.info(f'Цикл опроса занял {elapsed:.1f} с')
+                await asyncio.sleep(max(0, RETRY_PERIOD - elapsed))
+    finally:
+        await bot.close_session()
+
+
+def main():
+    """Запускает бота в асинхронном режиме."""
+    if len(sys.argv) > 1:
+        if not TELEGRAM_TOKEN:
+            logger.critical('Отсутствует переменная окружения TELEGRAM_TOKEN')
+            sys.exit(1)
+        tenants = load_tenants(sys.argv[1])
+    else:
+        if not check_tokens():
+            sys.exit(1)
+        tenant = Tenant(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)
+        for chat_id in TELEGRAM_SUBSCRIBERS:
+            tenant.subscribe(chat_id)
+        tenants = [tenant]
+    for tenant in tenants:
+        tenant.errors = ErrorSuppressor(ERROR_SUPPRESS_WINDOW)
+    asyncio.run(run_async(tenants))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Загрузка истории статусов работ для новых учеников.
+
+API умеет только нижнюю границу from_date, поэтому история каждого
+ученика читается одним потоковым запросом с from_date=start, а уже
+на стороне бота делится на окна, и каждое окно сохраняется в
+хранилище состояния отдельной транзакцией. Ученики загружаются
+параллельно через общий пул соединений. Уведомления при
+этом не отправляются: после загрузки бот знает эти статусы и не
+сообщает о них повторно.
+
+Запуск: python backfill.py tenants.json --start 0 --window 2592000
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from homework import (
+    STATE_DB,
+    create_session,
+    logger,
+    open_state_store,
+    request_api
+)
+from tenants import load_tenants
+
+BACKFILL_WINDOW = int(os.getenv('BACKFILL_WINDOW', 30 * 24 * 3600))
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', 8))
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def make_windows(start, end, window):
+    """Делит диапазон [start, end) на окна длиной window секунд."""
+    if window <= 0:
+        raise ValueError('Длина окна должна быть положительной')
+    return [
+        (left, min(left + window, end))
+        for left in range(int(start), int(end), int(window))
+    ]
+
+
+def fetch_history(tenant, start, end, session=None):
+    """Читает работы, обновленные в [start, end), одним запросом.
+
+    Ответ разбирается потоково, работы вне диапазона сразу
+    отбрасываются. Возвращает найденные работы и общее количество
+    прочитанных.
+    """
+    left, right = (time.strftime(DATE_FORMAT, time.gmtime(edge))
+                   for edge in (start, end))
+    found = []
+    read = 0
+    for homework in request_api(start, tenant.headers, session, stream=True):
+        read += 1
+        if left <= (homework.date_updated or left) < right:
+            found.append(homework)
+    return found, read
+
+
+def merge(batches):
+    """Объединяет работы: одна запись на работу, от старых к новым.
+
+    Если работа встретилась несколько раз, остается самый новый
+    статус.
+    """
+    latest = {}
+    for homeworks in batches:
+        for homework in homeworks:
+            known = latest.get(homework.key)
+            if known is None or (
+                (homework.date_updated or '') >= (known.date_updated or '')
+            ):
+                latest[homework.key] = homework
+    return sorted(
+        latest.values(), key=lambda homework: homework.date_updated or ''
+    )
+
+
+def split_windows(homeworks, windows):
+    """Раскладывает работы, упорядоченные по времени, по окнам.
+
+    Работа без даты обновления попадает в первое окно. Пустые окна
+    пропускаются.
+    """
+    batches = []
+    position = 0
+    for _, right in windows:
+        edge = time.strftime(DATE_FORMAT, time.gmtime(right))
+        batch = []
+        while position < len(homeworks) and (
+            (homeworks[position].date_updated or '') < edge
+        ):
+            batch.append(homeworks[position])
+            position += 1
+        if batch:
+            batches.append(batch)
+    return batches
+
+
+def backfill_tenant(tenant, store, windows, session=None):
+    """Загружает историю одного ученика и сохраняет ее по окнам.
+
+    Возвращает количество прочитанных и сохраненных работ.
+    """
+    start, end = windows[0][0], windows[-1][1]
+    found, read = fetch_history(tenant, start, end, session)
+    homeworks = merge([found])
+    for batch in split_windows(homeworks, windows):
+        for homework in batch:
+            tenant.index.record(homework)
+        store.save_homeworks(tenant, batch)
+    tenant.from_date = max(tenant.from_date, end)
+    store.save(tenant)
+    return read, len(homeworks)
+
+
+def backfill(tenants, store, start, end, window, concurrency, session=None):
+    """Загружает историю учеников и пишет в лог пропускную способность.
+
+    Возвращает словарь со счетчиками и скоростью загрузки.
+    """
+    windows = make_windows(start, end, window)
+    session = session or create_session(pool_size=concurrency)
+    store.restore(tenants)
+    started = time.perf_counter()
+    results = []
+    if windows:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda tenant: backfill_tenant(
+                    tenant, store, windows, session
+                ),
+                tenants
+            ))
+    store.flush()
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    read = sum(tenant_read for tenant_read, _ in results)
+    report = {
+        'tenants': len(tenants),
+        'requests': len(results),
+        'read': read,
+        'saved': sum(saved for _, saved in results),
+        'seconds': round(elapsed, 3),
+        'tenants_per_s': round(len(results) / elapsed, 1),
+        'homeworks_per_s': round(read / elapsed, 1)
+    }
+    logger.info(
+        'Загрузка истории: запросов %(requests)s, прочитано работ %(read)s, '
+        'сохранено %(saved)s за %(seconds)s с '
+        '(%(tenants_per_s)s учеников/с, %(homeworks_per_s)s работ/с)',
+        report
+    )
+    return report
+
+
+def parse_args():
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('tenants', help='реестр учеников: JSON или SQLite')
+    parser.add_argument('--start', type=int, default=0,
+                        help='начало диапазона, unix-время')
+    parser.add_argument('--end', type=int, default=None,
+                        help='конец диапазона, по умолчанию сейчас')
+    parser.add_argument('--window', type=int, default=BACKFILL_WINDOW,
+                        help='длина окна сохранения в секундах')
+    parser.add_argument('--concurrency', type=int,
+                        default=BACKFILL_CONCURRENCY,
+                        help='скольких учеников загружать одновременно')
+    return parser.parse_args()
+
+
+def main():
+    """Загружает историю для всех учеников из реестра."""
+    args = parse_args()
+    if STATE_DB == ':memory:':
+        logger.warning(
+            'STATE_DB не задана: загруженная история не сохранится'
+        )
+    store = open_state_store()
+    try:
+        backfill(
+            load_tenants(args.tenants),
+            store,
+            args.start,
+            int(time.time()) if args.end is None else args.end,
+            args.window,
+            args.concurrency
+        )
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Скорость разбора ответов API разными декодерами JSON.
+
+Для каждого размера списка работ сравнивает response.json() из
+requests с декодерами из decoders.DECODERS, которые читают байты
+тела напрямую.
+
+Запуск: python -m benchmarks.bench_decoding --sizes 1 100 1000 10000
+"""
+import argparse
+import json
+import time
+
+import requests
+
+from benchmarks.servers import make_homeworks
+from decoders import DECODERS
+
+
+def make_response(content):
+    """Ответ requests с готовым телом, как после сетевого запроса."""
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.encoding = 'utf-8'
+    return response
+
+
+def per_call(function, iterations):
+    """Среднее время одного вызова в миллисекундах."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    """Печатает время разбора для каждого размера и декодера."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1, 100, 1000, 10000])
+    parser.add_argument('--budget', type=float, default=1.0,
+                        help='примерное время на один замер, с')
+    args = parser.parse_args()
+
+    print(f'{"работ":>7} {"КБ":>8} {"response.json":>14}', end='')
+    for name in DECODERS:
+        print(f' {name:>10}', end='')
+    print()
+    for size in args.sizes:
+        content = json.dumps({
+            'homeworks': make_homeworks(size),
+            'current_date': 1_700_000_000
+        }, ensure_ascii=False).encode()
+        response = make_response(content)
+        single = per_call(response.json, 1) / 1000
+        iterations = max(1, int(args.budget / max(single, 1e-6)))
+        print(f'{size:>7} {len(content) / 1024:>8.1f} '
+              f'{per_call(response.json, iterations):>11.3f} мс', end='')
+        for loads in DECODERS.values():
+            cost = per_call(lambda: loads(content), iterations)
+            print(f' {cost:>7.3f} мс', end='')
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Цена логирования в parse_status и send_message на больших работах.
+
+Сравнивает прежнее логирование f-строкой с отложенным форматированием,
+а также check_response с флагом LOG_PAYLOADS и без него. Обработчики
+бота пишут только INFO, поэтому DEBUG-записи не форматируются ни в
+одном из вариантов, кроме f-строки, которая собирается до вызова
+логгера.
+
+Запуск: python -m benchmarks.bench_logging --comment-kb 64
+"""
+import argparse
+import time
+
+import homework
+from benchmarks.servers import make_homeworks
+
+
+class NullBot:
+    """Бот, который ничего не отправляет."""
+
+    def send_message(self, chat_id=None, text=None):
+        """Принимает сообщение."""
+
+
+def eager_parse_status(homework_dict):
+    """parse_status с прежним логированием f-строкой."""
+    homework.logger.debug(
+        f'Бот извлекает информацию о домашней работе: {homework_dict}'
+    )
+    return homework.parse_status(homework_dict)
+
+
+def per_call(function, argument, iterations):
+    """Среднее время одного вызова в микросекундах."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function(argument)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    """Печатает стоимость вызовов для каждого варианта."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--comment-kb', type=int, default=64,
+                        help='размер комментария ревьюера в КБ')
+    args = parser.parse_args()
+
+    item = make_homeworks(1)[0]
+    item['reviewer_comment'] = 'x' * args.comment_kb * 1024
+    bot = NullBot()
+    homework.TELEGRAM_CHAT_ID = '1'
+    message = homework.parse_status(item)
+
+    cases = [
+        ('parse_status, f-строка', eager_parse_status, item),
+        ('parse_status, отложенное', homework.parse_status, item),
+        ('send_message', lambda text: homework.send_message(bot, text),
+         message),
+    ]
+    for name, function, argument in cases:
+        print(f'{name:>28}: '
+              f'{per_call(function, argument, args.iterations):.2f} us')
+    response = {'homeworks': [item], 'current_date': 1}
+    for flag in (False, True):
+        homework.LOG_PAYLOADS = flag
+        cost = per_call(homework.check_response, response, args.iterations)
+        name = f'check_response, LOG_PAYLOADS={int(flag)}'
+        print(f'{name:>28}: {cost:.2f} us')
+
+
+if __name__ == '__main__':
+    main()
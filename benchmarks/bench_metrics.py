@@ -0,0 +1,61 @@
+"""Цена записи метрик на горячем пути.
+
+Сравнивает пустой цикл с observe(), inc() и замером через time(),
+в том числе из нескольких потоков, которые делят одну блокировку.
+
+Запуск: python -m benchmarks.bench_metrics --iterations 1000000
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import Registry
+
+
+def per_call(function, iterations):
+    """Среднее время одного вызова в наносекундах."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) / iterations * 1e9
+
+
+def main():
+    """Печатает стоимость операций с метриками."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=1_000_000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    registry = Registry()
+    histogram = registry.histogram('latency', 'Задержка')
+    counter = registry.counter('errors_total', 'Ошибки', ('type',))
+
+    def timed():
+        with histogram.time():
+            pass
+
+    baseline = per_call(lambda: None, args.iterations)
+    cases = {
+        'observe': lambda: histogram.observe(0.042),
+        'inc': lambda: counter.inc('APIResponseError'),
+        'time': timed,
+    }
+    for name, function in cases.items():
+        cost = per_call(function, args.iterations) - baseline
+        print(f'{name:>8}: {cost:.0f} ns')
+
+    iterations = args.iterations // args.threads
+    with ThreadPoolExecutor(args.threads) as executor:
+        costs = list(executor.map(
+            lambda _: per_call(cases['observe'], iterations),
+            range(args.threads)
+        ))
+    print(f'observe x{args.threads} threads: {max(costs):.0f} ns')
+    started = time.perf_counter()
+    registry.render()
+    print(f'render: {(time.perf_counter() - started) * 1e6:.0f} us')
+
+
+if __name__ == '__main__':
+    main()
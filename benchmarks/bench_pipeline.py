@@ -0,0 +1,152 @@
+"""Пропускная способность и задержки всей цепочки бота.
+
+Каждая итерация проходит get_api_answer -> check_response ->
+parse_status -> send_message против локальных серверов Практикума и
+Telegram. Результат можно сохранить как базовый и сравнивать с ним
+следующие запуски: при регрессии скрипт завершается с кодом 1.
+Серверы работают в том же процессе, поэтому абсолютные цифры
+сравнимы только между запусками на одной машине.
+
+Запуск:
+    python -m benchmarks.bench_pipeline --iterations 2000 --concurrency 16
+    python -m benchmarks.bench_pipeline --save-baseline baseline.json
+    python -m benchmarks.bench_pipeline --baseline baseline.json
+"""
+import argparse
+import json
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import telebot
+
+import homework
+from benchmarks.servers import (
+    FakePracticumServer,
+    FakeTelegramServer,
+    make_homeworks
+)
+
+
+def percentile(ordered, fraction):
+    """Перцентиль по отсортированному списку."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_iteration(bot):
+    """Одна итерация цикла бота; возвращает число сообщений."""
+    response = homework.get_api_answer(0)
+    homeworks = homework.check_response(response)
+    messages = [homework.parse_status(item) for item in homeworks]
+    for message in messages:
+        homework.send_message(bot, message)
+    return len(messages)
+
+
+def measure(iterations, concurrency, bot):
+    """Запускает итерации в пуле потоков и собирает статистику."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def timed(_):
+        started = time.perf_counter()
+        try:
+            run_iteration(bot)
+        except Exception as error:
+            with lock:
+                errors.append(type(error).__name__)
+            return
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in executor.map(timed, range(iterations)):
+            pass
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies) or [0.0]
+    return {
+        'iterations_per_s': round(iterations / elapsed, 1),
+        'p50_ms': round(statistics.median(ordered) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'errors': len(errors),
+        'max_rss_mb': round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+
+
+def find_regressions(result, baseline, tolerance):
+    """Сравнивает результат с базовым и возвращает список регрессий."""
+    regressions = []
+    if result['iterations_per_s'] < baseline['iterations_per_s'] * (
+        1 - tolerance
+    ):
+        regressions.append('iterations_per_s')
+    for key in ('p50_ms', 'p99_ms', 'max_rss_mb'):
+        if result[key] > baseline[key] * (1 + tolerance):
+            regressions.append(key)
+    return regressions
+
+
+def parse_args():
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--homeworks', type=int, default=1,
+                        help='работ в ответе API (размер ответа)')
+    parser.add_argument('--api-latency-ms', type=float, default=0)
+    parser.add_argument('--api-error-rate', type=float, default=0)
+    parser.add_argument('--telegram-latency-ms', type=float, default=0)
+    parser.add_argument('--telegram-error-rate', type=float, default=0)
+    parser.add_argument('--baseline', help='файл базового результата')
+    parser.add_argument('--save-baseline', help='куда сохранить результат')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='допустимое ухудшение, доля')
+    return parser.parse_args()
+
+
+def main():
+    """Запускает бенчмарк и сравнивает результат с базовым."""
+    args = parse_args()
+    # Логи и повторы искажают замер самой цепочки
+    homework.logger.disabled = True
+    homework.API_RETRY_ATTEMPTS = 1
+    homework.TELEGRAM_CHAT_ID = '1'
+    practicum = FakePracticumServer(
+        make_homeworks(args.homeworks),
+        latency=args.api_latency_ms / 1000,
+        error_rate=args.api_error_rate
+    )
+    telegram = FakeTelegramServer(
+        latency=args.telegram_latency_ms / 1000,
+        error_rate=args.telegram_error_rate
+    )
+    with practicum, telegram:
+        homework.ENDPOINT = practicum.url
+        telebot.apihelper.API_URL = telegram.api_url
+        bot = telebot.TeleBot(token='1234:bench')
+        result = measure(args.iterations, args.concurrency, bot)
+
+    print(json.dumps(result, indent=2))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = find_regressions(result, baseline, args.tolerance)
+        if regressions:
+            print(f'Регрессия: {", ".join(regressions)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
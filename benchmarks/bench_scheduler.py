@@ -0,0 +1,81 @@
+"""Накладные расходы DeadlineScheduler на 100 тысячах учеников.
+
+Задача-заглушка только отмечает опоздание запуска относительно срока,
+поэтому замер показывает стоимость самого планирования.
+
+Запуск: python -m benchmarks.bench_scheduler --accounts 100000 --period 10
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from scheduler import DeadlineScheduler
+
+
+class Account:
+    """Имитация ученика со сроком следующего опроса."""
+
+    __slots__ = ('due',)
+
+    def __init__(self):
+        self.due = 0.0
+
+
+def main():
+    """Запускает планировщик и печатает сводку."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--accounts', type=int, default=100_000)
+    parser.add_argument('--period', type=float, default=10)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    lateness = []
+    per_second = {}
+
+    def task(account):
+        now = time.monotonic()
+        lateness.append(now - account.due)
+        second = int(now)
+        per_second[second] = per_second.get(second, 0) + 1
+        account.due = now + args.period
+        return args.period
+
+    accounts = [Account() for _ in range(args.accounts)]
+    scheduler = DeadlineScheduler(task, args.workers)
+    started = time.monotonic()
+    scheduler.schedule_evenly(accounts, args.period)
+    for due, _, account in scheduler.heap:
+        account.due = due
+
+    cpu_started = time.process_time()
+    thread = threading.Thread(target=scheduler.run, daemon=True)
+    thread.start()
+    time.sleep(args.duration)
+    scheduler.stop()
+    thread.join()
+    cpu = time.process_time() - cpu_started
+    wall = time.monotonic() - started
+
+    ordered = sorted(lateness)
+    # Первая и последняя секунды неполные
+    rates = [per_second[second] for second in sorted(per_second)[1:-1]]
+    print(f'accounts={args.accounts} period={args.period}s wall={wall:.1f}s')
+    print(
+        f'dispatched={len(ordered)} '
+        f'rate={len(ordered) / args.duration:.0f}/s '
+        f'cpu_per_dispatch={cpu / len(ordered) * 1e6:.1f} us'
+    )
+    print(
+        f'lateness p50={statistics.median(ordered) * 1000:.2f} ms '
+        f'p99={ordered[int(len(ordered) * 0.99)] * 1000:.2f} ms'
+    )
+    print(
+        f'per-second dispatches mean={statistics.mean(rates):.0f} '
+        f'stdev={statistics.pstdev(rates):.0f}'
+    )
+
+
+if __name__ == '__main__':
+    main()
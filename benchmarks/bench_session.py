@@ -0,0 +1,48 @@
+"""Сравнивает задержку запросов к API с пулом соединений и без него.
+
+Запуск: python -m benchmarks.bench_session --requests 500
+"""
+import argparse
+import statistics
+import time
+
+import homework
+from benchmarks.servers import FakePracticumServer
+
+
+def measure(requests_count, session):
+    """Возвращает задержки последовательных запросов в миллисекундах."""
+    latencies = []
+    for _ in range(requests_count):
+        started = time.perf_counter()
+        homework.request_api(0, homework.HEADERS, session)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(name, latencies):
+    """Печатает сводку по задержкам."""
+    ordered = sorted(latencies)
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    print(
+        f'{name:<12} mean={statistics.mean(ordered):.3f} ms '
+        f'p50={statistics.median(ordered):.3f} ms p99={p99:.3f} ms'
+    )
+
+
+def main():
+    """Запускает бенчмарк против локального сервера."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    # Логи на каждый запрос искажают замер
+    homework.logger.disabled = True
+    with FakePracticumServer() as server:
+        homework.ENDPOINT = server.url
+        report('no pool', measure(args.requests, None))
+        with homework.create_session(pool_size=1) as session:
+            report('pooled', measure(args.requests, session))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Локальные замены API Яндекс.Практикум и Telegram Bot API.
+
+Серверы работают в фоновом потоке, умеют добавлять задержку, отвечать
+ошибкой с заданной вероятностью и отдавать ответ нужного размера.
+"""
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def make_homeworks(count, seed=0):
+    """Создает список синтетических домашних работ, от новых к старым."""
+    generator = random.Random(seed)
+    return [
+        {
+            'id': number,
+            'status': generator.choice(STATUSES),
+            'homework_name': f'student__hw{number:05d}.zip',
+            'reviewer_comment': 'Комментарий ревьюера ' * 5,
+            'date_updated': time.strftime(
+                '%Y-%m-%dT%H:%M:%SZ', time.gmtime(1_700_000_000 - number)
+            ),
+            'lesson_name': f'Проект спринта {number}'
+        }
+        for number in range(count)
+    ]
+
+
+class BenchHTTPServer(ThreadingHTTPServer):
+    """HTTP-сервер с длинной очередью входящих соединений.
+
+    При стандартной очереди из 5 соединений параллельные клиенты
+    упираются в повтор SYN через секунду, и это искажает p99.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Общая часть обработчиков: задержка, ошибки и ответ в JSON."""
+
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело пишутся отдельно: без этого keep-alive
+    # упирается в задержку Nagle и отложенного ACK
+    disable_nagle_algorithm = True
+
+    def respond(self, body):
+        """Отвечает телом body или ошибкой с вероятностью error_rate."""
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        status = HTTPStatus.OK
+        if server.error_rate and random.random() < server.error_rate:
+            status, body = self.error_response()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        server.requests += 1
+
+    def error_response(self):
+        """Статус и тело ответа при имитации сбоя."""
+        return HTTPStatus.INTERNAL_SERVER_ERROR, b'{}'
+
+    def log_message(self, format, *args):
+        """Не засоряет вывод бенчмарка логами запросов."""
+
+
+class PracticumHandler(FakeHandler):
+    """Отдает заранее собранный ответ со списком домашних работ."""
+
+    def do_GET(self):
+        """Отвечает на запрос статусов домашних работ."""
+        self.respond(self.server.body)
+
+
+class TelegramHandler(FakeHandler):
+    """Принимает вызовы Bot API и подтверждает отправку сообщений."""
+
+    def do_POST(self):
+        """Отвечает на вызов метода Bot API."""
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.respond(json.dumps({
+            'ok': True,
+            'result': {
+                'message_id': self.server.requests,
+                'date': int(time.time()),
+                'chat': {'id': 1, 'type': 'private'},
+                'text': ''
+            }
+        }).encode())
+
+    def error_response(self):
+        """Ответ 429, как при превышении лимитов Telegram."""
+        return HTTPStatus.TOO_MANY_REQUESTS, json.dumps({
+            'ok': False,
+            'error_code': HTTPStatus.TOO_MANY_REQUESTS,
+            'description': 'Too Many Requests: retry after 1',
+            'parameters': {'retry_after': 1}
+        }).encode()
+
+
+class FakeServer:
+    """Сервер в фоновом потоке с настраиваемым поведением."""
+
+    handler = FakeHandler
+    path = '/'
+
+    def __init__(self, latency=0.0, error_rate=0.0):
+        self.httpd = BenchHTTPServer(('127.0.0.1', 0), self.handler)
+        self.httpd.latency = latency
+        self.httpd.error_rate = error_rate
+        self.httpd.requests = 0
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self):
+        """Базовый адрес сервера."""
+        host, port = self.httpd.server_address
+        return f'http://{host}:{port}{self.path}'
+
+    @property
+    def requests(self):
+        """Количество обработанных запросов."""
+        return self.httpd.requests
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakePracticumServer(FakeServer):
+    """Замена API Практикума; url подставляется вместо ENDPOINT."""
+
+    handler = PracticumHandler
+    path = '/api/user_api/homework_statuses/'
+
+    def __init__(self, homeworks=(), current_date=0, **kwargs):
+        super().__init__(**kwargs)
+        self.httpd.body = json.dumps({
+            'homeworks': list(homeworks),
+            'current_date': current_date
+        }).encode()
+
+
+class FakeTelegramServer(FakeServer):
+    """Замена Telegram Bot API; api_url подставляется в telebot."""
+
+    handler = TelegramHandler
+
+    @property
+    def api_url(self):
+        """Шаблон адреса для telebot.apihelper.API_URL."""
+        return self.url + 'bot{0}/{1}'
@@ -0,0 +1,146 @@
+"""Симуляция месяца опросов на виртуальных часах.
+
+Все ученики опрашиваются через poll_tenant() с AdaptiveInterval и
+DeadlineScheduler, но вместо сети отвечает SimulatedApi, а время
+сдвигает VirtualClock. Скрипт печатает процессорное время на один
+опрос и рост памяти по дням, чтобы поймать утечки в долгом цикле.
+
+Запуск: python -m benchmarks.simulate --tenants 100 --days 30
+"""
+import argparse
+import bisect
+import random
+import time
+import tracemalloc
+from http import HTTPStatus
+
+import homework
+from clock import VirtualClock
+from scheduler import AdaptiveInterval, DeadlineScheduler
+from state import StateStore
+from tenants import Tenant
+
+DAY = 24 * 3600
+START = 1_700_000_000
+VERDICTS = ('approved', 'rejected')
+
+
+class SimulatedResponse:
+    """Ответ SimulatedApi в интерфейсе requests.Response."""
+
+    status_code = HTTPStatus.OK
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        """Тело ответа."""
+        return self.data
+
+
+class SimulatedApi:
+    """API Практикума в памяти: статусы меняются по расписанию.
+
+    Подставляется в poll_tenant() вместо сессии requests.
+    """
+
+    def __init__(self, clock, tokens, homeworks, days, seed=0):
+        self.clock = clock
+        self.events = {}
+        generator = random.Random(seed)
+        for token in tokens:
+            events = []
+            for number in range(homeworks):
+                moment = START + generator.uniform(0, days * DAY)
+                for status in ('reviewing', generator.choice(VERDICTS)):
+                    events.append((moment, number, status))
+                    moment += generator.uniform(600, DAY)
+            events.sort()
+            self.events[token] = (
+                [event[0] for event in events], events
+            )
+        self.requests = 0
+
+    def get(self, url, headers, params, **kwargs):
+        """Возвращает работы, изменившиеся с from_date."""
+        self.requests += 1
+        now = self.clock.time()
+        moments, events = self.events[headers['Authorization'][6:]]
+        first = bisect.bisect_left(moments, params['from_date'])
+        last = bisect.bisect_right(moments, now)
+        latest = {}
+        for moment, number, status in events[first:last]:
+            latest[number] = {
+                'id': number,
+                'homework_name': f'hw{number}.zip',
+                'status': status,
+                'date_updated': time.strftime(
+                    '%Y-%m-%dT%H:%M:%SZ', time.gmtime(moment)
+                )
+            }
+        return SimulatedResponse({
+            'homeworks': sorted(
+                latest.values(), key=lambda item: item['date_updated'],
+                reverse=True
+            ),
+            'current_date': int(now)
+        })
+
+
+def main():
+    """Прогоняет симуляцию и печатает сводку."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--homeworks', type=int, default=10)
+    parser.add_argument('--floor', type=float, default=60)
+    parser.add_argument('--ceiling', type=float, default=3600)
+    parser.add_argument('--no-trace-memory', action='store_true',
+                        help='не замерять память ради точного CPU')
+    args = parser.parse_args()
+
+    homework.logger.disabled = True
+    clock = VirtualClock(START)
+    homework.CLOCK = clock
+    tokens = [f'token{number}' for number in range(args.tenants)]
+    api = SimulatedApi(clock, tokens, args.homeworks, args.days)
+    store = StateStore(flush_interval=60, clock=clock.monotonic)
+    tenants = [Tenant(token, number, START) for number, token in
+               enumerate(tokens)]
+    sent = []
+
+    def poll(tenant):
+        homeworks = homework.poll_tenant(tenant, sent.append, api)
+        store.save(tenant)
+        # Сообщения только считаются, чтобы список не рос весь прогон
+        sent.clear()
+        return tenant.interval.update(homeworks)
+
+    for tenant in tenants:
+        tenant.interval = AdaptiveInterval(args.floor, args.ceiling)
+    scheduler = DeadlineScheduler(
+        poll, 1, clock=clock.monotonic, sleep=clock.sleep
+    )
+    scheduler.schedule_evenly(tenants, args.floor)
+
+    if not args.no_trace_memory:
+        tracemalloc.start()
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    polls = 0
+    for day in range(1, args.days + 1):
+        polls += scheduler.run_inline(until=START + day * DAY)
+        if not args.no_trace_memory:
+            current, _ = tracemalloc.get_traced_memory()
+            print(f'day {day:>3}: polls={polls} memory={current / 1e6:.2f} MB')
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+
+    print(
+        f'tenants={args.tenants} days={args.days} polls={polls} '
+        f'wall={wall:.1f}s cpu_per_poll={cpu / max(polls, 1) * 1e6:.1f} us'
+    )
+
+
+if __name__ == '__main__':
+    main()
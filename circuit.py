@@ -0,0 +1,154 @@
+"""Предохранитель для запросов к API, общий для всех опросов."""
+import threading
+import time
+from contextlib import contextmanager
+
+from exceptions import CircuitOpenError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+# Числовые коды состояний для метрик
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Размыкается после failure_threshold неудач подряд.
+
+    В разомкнутом состоянии запросы сразу отклоняются исключением
+    CircuitOpenError. Через reset_timeout секунд пропускается один
+    пробный запрос: неудача снова размыкает цепь, успех замыкает ее.
+    После замыкания доля пропускаемых запросов растет от нуля до
+    всех за ramp_up секунд, поэтому вернувшийся API не получает
+    сразу все накопившиеся опросы. Неудачей считаются только
+    исключения из failures; остальные означают, что API ответил.
+    on_change(old, new) вызывается при каждой смене состояния.
+    """
+
+    def __init__(
+        self, failure_threshold=5, reset_timeout=60, ramp_up=60,
+        failures=(Exception,), clock=time.monotonic, on_change=None
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.ramp_up = ramp_up
+        self.failures = failures
+        self.clock = clock
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failed = 0
+        self.opened_at = 0
+        self.closed_at = None
+        self.probing = False
+        self.attempted = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def call(self, function, *args, **kwargs):
+        """Вызывает function, если предохранитель пропускает запрос."""
+        with self.guard():
+            return function(*args, **kwargs)
+
+    @contextmanager
+    def guard(self):
+        """Пропускает блок кода и учитывает его результат.
+
+        Подходит и для асинхронного кода: внутри блока можно ждать
+        ответа через await.
+        """
+        probe = self.allow()
+        try:
+            yield
+        except self.failures:
+            self.record_failure()
+            raise
+        except Exception:
+            self.record_success()
+            raise
+        else:
+            self.record_success()
+        finally:
+            if probe:
+                with self.lock:
+                    self.probing = False
+
+    def allow(self):
+        """Пропускает запрос или выбрасывает CircuitOpenError.
+
+        Возвращает True для пробного запроса: пока он не завершился
+        через record_success() или record_failure(), другие запросы
+        отклоняются.
+        """
+        with self.lock:
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    self._reject()
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self.probing:
+                    self._reject()
+                self.probing = True
+                return True
+            if not self._admit():
+                self._reject()
+            return False
+
+    def record_success(self):
+        """Учитывает успешный запрос."""
+        with self.lock:
+            self.failed = 0
+            if self.state == HALF_OPEN:
+                self.closed_at = self.clock()
+                self.attempted = self.admitted = 0
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        """Учитывает неудачный запрос."""
+        with self.lock:
+            self.failed += 1
+            if (
+                self.state == HALF_OPEN
+                or self.failed >= self.failure_threshold
+            ):
+                self.opened_at = self.clock()
+                self.closed_at = None
+                self._set_state(OPEN)
+
+    @property
+    def code(self):
+        """Числовой код состояния для метрик."""
+        return STATE_CODES[self.state]
+
+    def _admit(self):
+        """Решает, пропустить ли запрос, пока доля запросов растет.
+
+        Пропускается столько запросов, чтобы их доля среди всех
+        попыток не превышала прошедшую часть ramp_up.
+        """
+        if self.closed_at is None or not self.ramp_up:
+            return True
+        share = (self.clock() - self.closed_at) / self.ramp_up
+        if share >= 1:
+            self.closed_at = None
+            return True
+        self.attempted += 1
+        if self.admitted < share * self.attempted:
+            self.admitted += 1
+            return True
+        return False
+
+    def _reject(self):
+        """Отклоняет запрос.
+
+        Текст ошибки не зависит от состояния, чтобы ученик не получал
+        новое сообщение о сбое при каждой смене состояния.
+        """
+        self.rejected += 1
+        raise CircuitOpenError('API недоступен, запрос отклонен')
+
+    def _set_state(self, state):
+        """Меняет состояние и сообщает об этом."""
+        old, self.state = self.state, state
+        if self.on_change is not None:
+            self.on_change(old, state)
@@ -0,0 +1,49 @@
+"""Источники времени для бота: настоящее и виртуальное."""
+import threading
+import time
+
+
+class SystemClock:
+    """Настоящие часы процесса."""
+
+    def time(self):
+        """Текущее время Unix в секундах."""
+        return time.time()
+
+    def monotonic(self):
+        """Монотонное время для измерения интервалов."""
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        """Приостанавливает поток на seconds секунд."""
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """Виртуальные часы: sleep() не ждет, а сдвигает время вперед.
+
+    Позволяет прогнать недели опросов за секунды. Время общее для всех
+    потоков, поэтому sleep() стоит вызывать из одного управляющего
+    потока.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = float(start)
+        self.lock = threading.Lock()
+
+    def time(self):
+        """Текущее виртуальное время."""
+        return self.now
+
+    def monotonic(self):
+        """Виртуальное время; оно монотонно по построению."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Сдвигает время на seconds секунд."""
+        if seconds > 0:
+            with self.lock:
+                self.now += seconds
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,65 @@
+"""Сведение уведомлений одного чата перед отправкой в Telegram."""
+
+# Предельная длина сообщения Telegram
+MESSAGE_LIMIT = 4096
+DIGEST_TITLE = 'Обновления статусов ({count}):'
+
+
+def latest_only(texts, key):
+    """Оставляет для каждой работы только последнее сообщение.
+
+    key(text) возвращает ключ работы или None; сообщения без ключа
+    остаются все. Порядок определяется последним сообщением работы.
+    """
+    latest = {}
+    for position, text in enumerate(texts):
+        text_key = None if key is None else key(text)
+        latest[position if text_key is None else ('key', text_key)] = (
+            position
+        )
+    return [texts[position] for position in sorted(latest.values())]
+
+
+def make_digests(texts, limit=MESSAGE_LIMIT):
+    """Собирает сообщения в сводки не длиннее limit символов.
+
+    Одно сообщение отправляется как есть. Сообщение, которое само
+    длиннее лимита, занимает отдельную сводку целиком.
+    """
+    if len(texts) <= 1:
+        return list(texts)
+    # Заголовок с самым большим возможным числом сообщений
+    budget = limit - len(DIGEST_TITLE.format(count=len(texts)))
+    digests = []
+    lines = []
+    size = 0
+    for text in texts:
+        line = f'• {text}'
+        if lines and size + len(line) + 1 > budget:
+            digests.append(lines)
+            lines, size = [], 0
+        lines.append(line)
+        size += len(line) + 1
+    digests.append(lines)
+    return [
+        '\n'.join([DIGEST_TITLE.format(count=len(lines)), *lines])
+        for lines in digests
+    ]
+
+
+def get_coalescer(mode, key=None, limit=MESSAGE_LIMIT):
+    """Возвращает функцию сведения сообщений чата по имени режима.
+
+    '' — не сводить (None), latest — только последний статус каждой
+    работы, digest — одна сводка из последних статусов всех работ.
+    """
+    if not mode:
+        return None
+    if mode == 'latest':
+        return lambda texts: latest_only(texts, key)
+    if mode == 'digest':
+        return lambda texts: make_digests(latest_only(texts, key), limit)
+    raise ValueError(
+        f'Неизвестный режим сведения уведомлений: {mode}. '
+        'Доступны: latest, digest'
+    )
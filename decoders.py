@@ -0,0 +1,42 @@
+"""Разбор JSON-ответов API с выбором библиотеки.
+
+Если установлен orjson, ответ разбирается прямо из байтов тела без
+промежуточной строки; иначе используется стандартный json.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def stdlib_loads(data):
+    """Разбирает JSON стандартной библиотекой."""
+    return json.loads(data)
+
+
+DECODERS = {'json': stdlib_loads}
+if orjson is not None:
+    DECODERS['orjson'] = orjson.loads
+
+
+def register_decoder(name, loads):
+    """Добавляет декодер: loads принимает bytes и выбрасывает ValueError."""
+    DECODERS[name] = loads
+
+
+def get_decoder(name='auto'):
+    """Возвращает функцию разбора JSON по имени.
+
+    'auto' выбирает самую быструю из установленных библиотек.
+    """
+    if name == 'auto':
+        return DECODERS.get('orjson', stdlib_loads)
+    try:
+        return DECODERS[name]
+    except KeyError:
+        raise ValueError(
+            f'Неизвестный декодер JSON: {name}. '
+            f'Доступны: {", ".join(DECODERS)}'
+        )
@@ -0,0 +1,340 @@
+"""Движок опроса API для многих учеников в одном процессе."""
+import os
+import sys
+import threading
+from functools import partial
+
+import telebot
+
+from clock import SYSTEM_CLOCK
+from exceptions import SendMessageError, ShutdownRequested
+from homework import (
+    API_STREAM,
+    COALESCE,
+    ERROR_SUPPRESS_WINDOW,
+    LEASE_PARTITIONS,
+    LEASE_TTL,
+    LOOP_LAG,
+    METRICS_PORT,
+    NOTIFY_COALESCE_WINDOW,
+    POLL_BACKOFF,
+    POLL_CEILING,
+    POLL_FLOOR,
+    QUEUE_DEPTH,
+    RETRY_PERIOD,
+    SHUTDOWN_TIMEOUT,
+    TELEGRAM_TOKEN,
+    create_session,
+    logger,
+    open_leases,
+    open_outbox,
+    open_state_store,
+    poll_tenant,
+    send_to_chat
+)
+from incidents import ErrorSuppressor
+from leases import Partitions, partition_of
+from metrics import start_metrics_server
+from notifier import Notifier
+from outbox import Delivery, is_permanent
+from scheduler import AdaptiveInterval, DeadlineScheduler
+from shutdown import GracefulShutdown, run_with_timeout
+from tenants import load_tenants
+
+TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.json')
+POLL_WORKERS = int(os.getenv('POLL_WORKERS', 32))
+NOTIFY_WORKERS = int(os.getenv('NOTIFY_WORKERS', 4))
+NOTIFY_QUEUE_SIZE = int(os.getenv('NOTIFY_QUEUE_SIZE', 10000))
+# Лимиты Telegram: около 30 сообщений в секунду на бота и 1 на чат
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+# Сколько секунд отправляемое сообщение не выдается на повтор
+OUTBOX_LEASE = float(os.getenv('OUTBOX_LEASE', 300))
+OUTBOX_BATCH = int(os.getenv('OUTBOX_BATCH', 500))
+OUTBOX_RETRY_INTERVAL = float(os.getenv('OUTBOX_RETRY_INTERVAL', 30))
+
+
+class PollingEngine:
+    """Опрашивает API для каждого ученика из реестра.
+
+    Каждый ученик опрашивается к своему сроку: сроки ведет
+    DeadlineScheduler, паузу после опроса выбирает AdaptiveInterval.
+    Сообщения сохраняются в Outbox и уходят через очередь Notifier,
+    не задерживая опрос; неудачные отправки повторяются из журнала.
+    По SIGTERM движок дожидается начатых опросов и отправок и выходит.
+    Если передано хранилище аренд, несколько движков делят учеников по
+    частям, и каждого ученика опрашивает ровно один из них.
+    """
+
+    def __init__(
+        self, bot, tenants, workers=POLL_WORKERS, store=None, outbox=None,
+        session=None, clock=SYSTEM_CLOCK, leases=None
+    ):
+        self.bot = bot
+        self.tenants = tenants
+        self.clock = clock
+        self.partitions = (
+            None if leases is None else Partitions(leases, LEASE_PARTITIONS)
+        )
+        self.shutdown = GracefulShutdown()
+        self.store = store or open_state_store()
+        self.outbox = outbox or open_outbox()
+        restored = self.store.restore(tenants)
+        logger.info(f'Восстановлено состояние учеников: {restored}')
+        self.session = session or create_session(pool_size=workers)
+        self.notifier = Notifier(
+            partial(send_to_chat, bot),
+            workers=NOTIFY_WORKERS,
+            queue_size=NOTIFY_QUEUE_SIZE,
+            global_rate=TELEGRAM_GLOBAL_RATE,
+            chat_rate=TELEGRAM_CHAT_RATE,
+            on_sent=self.sent,
+            on_error=self.send_failed,
+            sleep=clock.sleep,
+            clock=clock.monotonic,
+            logger=logger
+        ).start()
+        QUEUE_DEPTH.function = self.notifier.qsize
+        self.scheduler = DeadlineScheduler(
+            self.poll, workers, clock=clock.monotonic, sleep=clock.sleep,
+            on_lag=LOOP_LAG.observe, on_error=self.poll_failed,
+            error_delay=POLL_CEILING
+        )
+        self.rebalanced = clock.monotonic()
+        for tenant in tenants:
+            tenant.interval = AdaptiveInterval(
+                POLL_FLOOR, POLL_CEILING, POLL_BACKOFF
+            )
+            tenant.errors = ErrorSuppressor(
+                ERROR_SUPPRESS_WINDOW, clock.monotonic
+            )
+
+    def poll(self, tenant):
+        """Опрашивает API для одного ученика и возвращает паузу.
+
+        Ученика чужой части не опрашивает, а проверяет снова после
+        ближайшего перераспределения частей.
+        """
+        if not self.owns(tenant):
+            return LEASE_TTL / 3
+        homeworks = poll_tenant(
+            tenant,
+            partial(self.notify, tenant.chat_ids),
+            self.session,
+            API_STREAM
+        )
+        self.store.save(tenant)
+        delay = tenant.interval.update(homeworks)
+        logger.debug('Следующий запрос для %s через %s с', tenant, delay)
+        return delay
+
+    def poll_failed(self, tenant, error):
+        """Пишет в лог сбой опроса, который не обработал poll_tenant."""
+        logger.error(
+            'Сбой опроса %s, повтор через %s с: %s',
+            tenant, POLL_CEILING, error
+        )
+
+    def owns(self, tenant):
+        """Обслуживает ли этот движок ученика."""
+        return self.partitions is None or self.partitions.owns(tenant.key)
+
+    def rebalance(self):
+        """Продлевает аренды частей и выравнивает их между движками.
+
+        Перед этим состояние сбрасывается на диск, чтобы движок,
+        получивший отданную часть, продолжил с последней метки.
+        """
+        self.store.flush()
+        acquired, lost = self.partitions.rebalance(self.restore_parts)
+        self.rebalanced = self.clock.monotonic()
+        if acquired or lost:
+            logger.info(
+                f'Части учеников: получено {len(acquired)}, '
+                f'отдано {len(lost)}, '
+                f'обслуживается {len(self.partitions.owned)}'
+            )
+
+    def rebalance_forever(self):
+        """Перераспределяет части до остановки движка.
+
+        Сбой базы аренд не останавливает поток. Если аренды не
+        продлевались дольше LEASE_TTL, они уже могли перейти к другим
+        движкам, поэтому этот движок перестает опрашивать учеников.
+        """
+        while not self.shutdown.wait(LEASE_TTL / 3):
+            try:
+                self.rebalance()
+            except Exception as error:
+                logger.error('Сбой перераспределения частей: %s', error)
+                expired = (
+                    self.clock.monotonic() - self.rebalanced >= LEASE_TTL
+                )
+                if expired and self.partitions.owned:
+                    logger.warning(
+                        'Аренды частей истекли, опрос приостановлен'
+                    )
+                    self.partitions.owned = frozenset()
+
+    def restore_parts(self, parts):
+        """Перечитывает состояние учеников из полученных частей."""
+        self.store.restore([
+            tenant for tenant in self.tenants
+            if partition_of(tenant.key, self.partitions.partitions) in parts
+        ])
+
+    def notify(self, chat_ids, text):
+        """Сохраняет сообщение для всех подписчиков и ставит в очередь.
+
+        Записи в журнал делаются одной транзакцией, а отправки в разные
+        чаты расходятся по отправителям Notifier и идут параллельно.
+        Если задано окно NOTIFY_COALESCE_WINDOW, сообщения копятся в
+        журнале и уходят сводкой при повторной выдаче.
+        """
+        if NOTIFY_COALESCE_WINDOW:
+            self.outbox.add_many(chat_ids, text, lease=NOTIFY_COALESCE_WINDOW)
+            return
+        message_ids = self.outbox.add_many(
+            chat_ids, text, lease=OUTBOX_LEASE
+        )
+        for chat_id, message_id in zip(chat_ids, message_ids):
+            try:
+                self.notifier.submit(
+                    str(chat_id), text, Delivery((message_id,))
+                )
+            except SendMessageError as error:
+                logger.warning(f'{error}: сообщение уйдет при повторе')
+
+    def sent(self, delivery):
+        """Помечает доставленными записи, все части которых ушли."""
+        for message_id in delivery.complete():
+            self.outbox.ack(message_id)
+
+    def send_failed(self, chat_id, text, error, delivery):
+        """Откладывает повтор записей, часть которых не удалось отправить."""
+        logger.error(f'Ошибка отправки сообщения в чат {chat_id}: {error}')
+        for message_id in delivery.fail():
+            if self.outbox.fail(message_id, is_permanent(error)):
+                logger.warning(
+                    'Сообщение %s в чат %s больше не отправляется',
+                    message_id, chat_id
+                )
+
+    def redeliver(self):
+        """Ставит в очередь сообщения, которым пора на повтор.
+
+        Сообщения одного чата сводятся по режиму NOTIFY_COALESCE.
+        Возвращает количество выданных журналом сообщений.
+        """
+        batches = self.outbox.claim_batches(
+            OUTBOX_BATCH, OUTBOX_LEASE, COALESCE
+        )
+        for message_ids, chat_id, texts in batches:
+            delivery = Delivery(message_ids, len(texts))
+            try:
+                for text in texts:
+                    self.notifier.submit(chat_id, text, delivery)
+            except SendMessageError:
+                # Остальные вернутся в выдачу, когда истечет lease
+                break
+        self.outbox.compact()
+        return sum(len(message_ids) for message_ids, _, _ in batches)
+
+    def redeliver_forever(self):
+        """Повторяет недоставленные сообщения до остановки движка.
+
+        Из нескольких движков повторы ведет владелец части 0.
+        """
+        while True:
+            if self.partitions is None or 0 in self.partitions.owned:
+                try:
+                    redelivered = self.redeliver()
+                except Exception as error:
+                    logger.error('Сбой повторной отправки: %s', error)
+                else:
+                    if redelivered:
+                        logger.info(
+                            f'Повторная отправка сообщений: {redelivered}'
+                        )
+            if self.shutdown.wait(OUTBOX_RETRY_INTERVAL):
+                return
+
+    def stop_on_signal(self):
+        """Останавливает планировщик, когда запрошена остановка."""
+        self.shutdown.wait()
+        self.scheduler.stop()
+
+    def run_once(self):
+        """Опрашивает всех учеников и дожидается завершения."""
+        for _ in self.scheduler.executor.map(self.poll, self.tenants):
+            pass
+
+    def run(self):
+        """Опрашивает учеников, равномерно распределяя запросы.
+
+        Первый ученик опрашивается сразу после запуска. Повторный
+        сигнал остановки прерывает ожидание отправок: сохраняется
+        только состояние.
+        """
+        logger.info(f'Движок обслуживает учеников: {len(self.tenants)}')
+        targets = [self.redeliver_forever, self.stop_on_signal]
+        if self.partitions is not None:
+            # Части распределяются до первого опроса
+            self.rebalance()
+            targets.append(self.rebalance_forever)
+        try:
+            with self.shutdown:
+                for target in targets:
+                    threading.Thread(target=target, daemon=True).start()
+                self.scheduler.schedule_evenly(self.tenants, RETRY_PERIOD)
+                self.scheduler.run()
+                logger.info('Движок останавливается')
+                self.close()
+        except ShutdownRequested as reason:
+            logger.warning(f'{reason}: выход без ожидания отправок')
+            self.store.flush()
+
+    def close(self, timeout=SHUTDOWN_TIMEOUT):
+        """Останавливает движок не дольше чем за timeout секунд.
+
+        Начатые опросы завершаются, очередь Notifier доотправляется,
+        состояние сохраняется. Что не успело уйти, остается в Outbox и
+        будет повторено после перезапуска.
+        """
+        self.shutdown.set()
+        self.scheduler.stop()
+        if run_with_timeout(self._drain, timeout):
+            self.store.close()
+            self.outbox.close()
+            logger.info('Движок остановлен')
+        else:
+            self.store.flush()
+            logger.warning(
+                f'Опросы и отправки не завершились за {timeout} с'
+            )
+        if self.partitions is not None:
+            # Другие движки забирают учеников, не дожидаясь срока аренд
+            self.partitions.release_all()
+
+    def _drain(self):
+        """Дожидается начатых опросов, затем отправок."""
+        self.scheduler.executor.shutdown(wait=True)
+        self.notifier.close()
+
+
+def main():
+    """Запускает опрос для всех учеников из реестра."""
+    if not TELEGRAM_TOKEN:
+        logger.critical('Отсутствует переменная окружения TELEGRAM_TOKEN')
+        sys.exit(1)
+    path = sys.argv[1] if len(sys.argv) > 1 else TENANTS_FILE
+    tenants = load_tenants(path)
+    bot = telebot.TeleBot(token=TELEGRAM_TOKEN)
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+        logger.info(f'Метрики доступны на порту {METRICS_PORT}')
+    PollingEngine(bot, tenants, leases=open_leases()).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,9 +6,25 @@ class ApiRequestException(APIResponseError):
     """Исключение для ошибок при получении ответа от API-сервиса."""
 
 
+class ApiServerError(APIResponseError):
+    """Исключение для ответов API с кодом 5xx."""
+
+
 class SendMessageError(APIResponseError):
     """Исключение для ошибок при отправке сообщения."""
 
 
 class UnknownHomeworkStatusError(APIResponseError):
-    """Исключение для неизвестного статуса домашней работы."""
\ No newline at end of file
+    """Исключение для неизвестного статуса домашней работы."""
+
+
+class ShutdownRequested(BaseException):
+    """Исключение, прерывающее ожидание при получении сигнала остановки.
+
+    Как и KeyboardInterrupt, наследуется от BaseException, чтобы его
+    не перехватывали обработчики ошибок опроса.
+    """
+
+
+class CircuitOpenError(APIResponseError):
+    """Исключение для запросов, отклоненных предохранителем API."""
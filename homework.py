@@ -1,34 +1,121 @@
+import atexit
 import logging
 from logging.handlers import RotatingFileHandler
 import os
+import random
+import re
 import sys
 import time
+from functools import partial
 from http import HTTPStatus
 
 import requests
 import telebot
 from dotenv import load_dotenv
 
+from circuit import OPEN, CircuitBreaker
+from clock import SYSTEM_CLOCK
+from coalesce import get_coalescer
+from decoders import get_decoder
 from exceptions import (
     SendMessageError,
     ApiRequestException,
+    ApiServerError,
     UnknownHomeworkStatusError,
-    APIResponseError
+    APIResponseError,
+    ShutdownRequested
 )
+from incidents import ErrorSuppressor
+from leases import Leader, LeaseStore
+from log_pipeline import (
+    CompressingRotatingFileHandler,
+    start_queue_logging
+)
+from metrics import REGISTRY, start_metrics_server
+from models import ApiResponse, Homework
+from outbox import Outbox
+from scheduler import AdaptiveInterval
+from shutdown import GracefulShutdown, run_with_timeout
+from state import StateStore
+from streaming import HomeworkStream
+from tenants import Tenant
 
 
 load_dotenv()
 
 LOG_FILE_PATH = os.path.join(os.path.expanduser('~'), 'bot.log')
+# Размер очереди логов; 0 — писать логи синхронно, как раньше
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 0))
+# При заполнении очереди выше доли LOG_SAMPLE_ABOVE проходит только
+# каждая LOG_SAMPLE_RATE-я запись ниже WARNING
+LOG_SAMPLE_ABOVE = float(os.getenv('LOG_SAMPLE_ABOVE', 0.8))
+LOG_SAMPLE_RATE = int(os.getenv('LOG_SAMPLE_RATE', 10))
+# Писать в DEBUG содержимое работ целиком, а не только их названия
+LOG_PAYLOADS = os.getenv('LOG_PAYLOADS', '0') == '1'
 
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+# Дополнительные чаты через запятую: получают те же уведомления
+TELEGRAM_SUBSCRIBERS = [
+    chat_id.strip()
+    for chat_id in os.getenv('TELEGRAM_SUBSCRIBERS', '').split(',')
+    if chat_id.strip()
+]
 
 RETRY_PERIOD = 600
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', 10))
+API_KEEP_ALIVE = os.getenv('API_KEEP_ALIVE', '1') == '1'
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 5))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 30))
+API_RETRY_ATTEMPTS = int(os.getenv('API_RETRY_ATTEMPTS', 3))
+API_RETRY_BACKOFF = float(os.getenv('API_RETRY_BACKOFF', 0.25))
+API_RETRY_BACKOFF_MAX = float(os.getenv('API_RETRY_BACKOFF_MAX', 10))
+API_RETRY_BUDGET = float(os.getenv('API_RETRY_BUDGET', 60))
+# Предохранитель API: размыкается после API_BREAKER_THRESHOLD неудачных
+# попыток подряд, общий для всех опросов процесса; 0 — не использовать
+API_BREAKER_THRESHOLD = int(os.getenv('API_BREAKER_THRESHOLD', 0))
+API_BREAKER_RESET = float(os.getenv('API_BREAKER_RESET', 60))
+API_BREAKER_RAMP = float(os.getenv('API_BREAKER_RAMP', 60))
+# Потоковый разбор ответа: работы читаются по одной, а не списком
+API_STREAM = os.getenv('API_STREAM', '0') == '1'
+API_STREAM_CHUNK_SIZE = int(os.getenv('API_STREAM_CHUNK_SIZE', 65536))
+# По умолчанию пауза постоянна и равна RETRY_PERIOD
+POLL_FLOOR = int(os.getenv('POLL_FLOOR', RETRY_PERIOD))
+POLL_CEILING = int(os.getenv('POLL_CEILING', RETRY_PERIOD))
+POLL_BACKOFF = float(os.getenv('POLL_BACKOFF', 2))
+# Без STATE_DB состояние живет только в памяти процесса
+STATE_DB = os.getenv('STATE_DB', ':memory:')
+STATE_SYNCHRONOUS = os.getenv('STATE_SYNCHRONOUS', 'NORMAL')
+STATE_FLUSH_EVERY = int(os.getenv('STATE_FLUSH_EVERY', 100))
+STATE_FLUSH_INTERVAL = float(os.getenv('STATE_FLUSH_INTERVAL', 5))
+OUTBOX_DB = os.getenv('OUTBOX_DB', STATE_DB)
+OUTBOX_RETRY_DELAY = float(os.getenv('OUTBOX_RETRY_DELAY', 30))
+OUTBOX_MAX_RETRY_DELAY = float(os.getenv('OUTBOX_MAX_RETRY_DELAY', 3600))
+# После стольких неудач подряд (около двух суток) сообщение не повторяется
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 48))
+# Библиотека разбора ответов API: auto, orjson или json
+JSON_DECODER = os.getenv('JSON_DECODER', 'auto')
+# Сведение уведомлений чата перед отправкой: пусто — по одному,
+# latest — только последний статус каждой работы, digest — одной сводкой
+NOTIFY_COALESCE = os.getenv('NOTIFY_COALESCE', '')
+# Сколько секунд движок копит уведомления чата перед сведением
+NOTIFY_COALESCE_WINDOW = float(os.getenv('NOTIFY_COALESCE_WINDOW', 0))
+# Сколько секунд не повторять сообщение о той же ошибке; 0 — не скрывать
+ERROR_SUPPRESS_WINDOW = float(os.getenv('ERROR_SUPPRESS_WINDOW', 3600))
+# Порт страницы /metrics; 0 — не запускать сервер метрик
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+# База аренд для нескольких процессов бота; пусто — процесс работает один
+LEASE_DB = os.getenv('LEASE_DB', '')
+# Через столько секунд после пропущенного продления аренды работу
+# процесса подхватывает другой; продление идет втрое чаще
+LEASE_TTL = float(os.getenv('LEASE_TTL', 30))
+LEASE_PARTITIONS = int(os.getenv('LEASE_PARTITIONS', 64))
+# Сколько секунд после SIGTERM можно доотправлять сообщения
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 10))
 
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -36,6 +123,10 @@ HOMEWORK_VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+# Часы для повторов запросов; в симуляциях подменяются виртуальными
+CLOCK = SYSTEM_CLOCK
+JSON_LOADS = get_decoder(JSON_DECODER)
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
@@ -43,7 +134,11 @@ formatter = logging.Formatter(
     '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-file_handler = RotatingFileHandler(
+# В режиме очереди старые файлы логов сжимаются в фоне
+file_handler_class = (
+    CompressingRotatingFileHandler if LOG_QUEUE_SIZE else RotatingFileHandler
+)
+file_handler = file_handler_class(
     LOG_FILE_PATH,
     maxBytes=50000000,
     backupCount=5,
@@ -57,8 +152,63 @@ console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
 console_handler.setLevel(logging.INFO)
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+if LOG_QUEUE_SIZE:
+    log_queue_handler, log_listener = start_queue_logging(
+        logger,
+        [file_handler, console_handler],
+        queue_size=LOG_QUEUE_SIZE,
+        sample_above=LOG_SAMPLE_ABOVE,
+        sample_rate=LOG_SAMPLE_RATE
+    )
+    atexit.register(log_listener.stop)
+else:
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+
+API_LATENCY = REGISTRY.histogram(
+    'homework_api_request_seconds',
+    'Длительность одной попытки запроса к API Практикума'
+)
+TELEGRAM_LATENCY = REGISTRY.histogram(
+    'homework_telegram_send_seconds',
+    'Длительность отправки сообщения в Telegram'
+)
+ERRORS = REGISTRY.counter(
+    'homework_errors_total', 'Ошибки запросов и отправок по типам', ('type',)
+)
+LOOP_LAG = REGISTRY.histogram(
+    'homework_loop_lag_seconds',
+    'Опоздание запуска опроса относительно запланированного срока'
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    'homework_queue_depth', 'Сообщений, ждущих отправки'
+)
+API_CIRCUIT = REGISTRY.gauge(
+    'homework_api_circuit_state',
+    'Состояние предохранителя API: 0 — замкнут, 1 — пробный запрос, '
+    '2 — разомкнут'
+)
+
+
+def log_circuit_change(old, new):
+    """Пишет в лог смену состояния предохранителя API."""
+    logger.log(
+        logging.WARNING if new == OPEN else logging.INFO,
+        'Предохранитель API: %s -> %s', old, new
+    )
+
+
+API_BREAKER = None
+if API_BREAKER_THRESHOLD:
+    API_BREAKER = CircuitBreaker(
+        failure_threshold=API_BREAKER_THRESHOLD,
+        reset_timeout=API_BREAKER_RESET,
+        ramp_up=API_BREAKER_RAMP,
+        failures=(ApiRequestException, ApiServerError),
+        clock=lambda: CLOCK.monotonic(),
+        on_change=log_circuit_change
+    )
+    API_CIRCUIT.function = lambda: API_BREAKER.code
 
 
 def check_tokens():
@@ -79,68 +229,210 @@ def check_tokens():
 
 def send_message(bot, message):
     """Отправляет сообщение в Telegram-чат."""
+    send_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_to_subscriber(bot, chat_id, message):
+    """Отправляет сообщение подписчику.
+
+    В основной чат TELEGRAM_CHAT_ID сообщение уходит через
+    send_message, в остальные — через send_to_chat.
+    """
+    if str(chat_id) == str(TELEGRAM_CHAT_ID):
+        send_message(bot, message)
+    else:
+        send_to_chat(bot, chat_id, message)
+
+
+def send_to_chat(bot, chat_id, message):
+    """Отправляет сообщение в указанный Telegram-чат."""
     try:
-        logging.debug(f'Бот отправляет сообщение: {message}')
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        logger.debug('Бот отправляет сообщение: %s', message)
+        with TELEGRAM_LATENCY.time():
+            bot.send_message(chat_id=chat_id, text=message)
     except (telebot.apihelper.ApiException, requests.RequestException) as e:
-        logger.error(f'Бот не смог отправить сообщение: {e}')
-        raise SendMessageError(f'Бот не смог отправить сообщение: {e}')
+        ERRORS.inc(SendMessageError.__name__)
+        logger.error('Бот не смог отправить сообщение: %s', e)
+        raise SendMessageError(
+            f'Бот не смог отправить сообщение: {e}'
+        ) from e
 
 
 def get_api_answer(timestamp):
     """Делает запрос к API-сервиса Яндекс.Практикум."""
+    return request_api(timestamp, HEADERS)
+
+
+def create_session(pool_size=API_POOL_SIZE, keep_alive=API_KEEP_ALIVE):
+    """Создает сессию с пулом соединений к API-сервису."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_size,
+        pool_block=True
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+    return session
+
+
+def request_api(timestamp, headers, session=None, stream=False):
+    """Делает запрос к API с заголовками конкретного ученика.
+
+    Если передана сессия, запрос идет через ее пул соединений.
+    Сетевые ошибки и ответы 5xx повторяются с экспоненциальной
+    задержкой, пока не исчерпаны попытки или API_RETRY_BUDGET:
+    повтор делается, только если после паузы в бюджете остается время
+    на соединение, а таймаут чтения повтора урезается до остатка.
+    С stream=True возвращает HomeworkStream вместо словаря.
+    """
     request_kwargs = {
         'url': ENDPOINT,
-        'headers': HEADERS,
-        'params': {'from_date': timestamp}
+        'headers': headers,
+        'params': {'from_date': timestamp},
+        'timeout': (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
     }
+    if stream:
+        request_kwargs['stream'] = True
 
     logger.debug(
-        f'Бот делает запрос к API-сервису Яндекс.Практикум: {ENDPOINT}'
+        'Бот делает запрос к API-сервису Яндекс.Практикум: %s', ENDPOINT
+    )
+
+    deadline = CLOCK.monotonic() + API_RETRY_BUDGET
+    for attempt in range(1, API_RETRY_ATTEMPTS + 1):
+        started = CLOCK.monotonic()
+        try:
+            response = _request_once(request_kwargs, session)
+        except (ApiRequestException, ApiServerError) as error:
+            elapsed = CLOCK.monotonic() - started
+            delay = backoff_delay(attempt)
+            remaining = deadline - CLOCK.monotonic() - delay
+            if (
+                attempt == API_RETRY_ATTEMPTS
+                or remaining <= API_CONNECT_TIMEOUT
+            ):
+                raise
+            request_kwargs['timeout'] = (
+                API_CONNECT_TIMEOUT,
+                min(API_READ_TIMEOUT, remaining - API_CONNECT_TIMEOUT)
+            )
+            logger.warning(
+                'Попытка %d запроса к API не удалась за %.0f мс: %s. '
+                'Повтор через %.2f с', attempt, elapsed * 1000, error, delay
+            )
+            CLOCK.sleep(delay)
+        else:
+            elapsed = CLOCK.monotonic() - started
+            logger.info(
+                'Бот получил ответ от API за %.0f мс (попытка %d)',
+                elapsed * 1000, attempt
+            )
+            return response
+
+
+def backoff_delay(attempt):
+    """Считает задержку перед повтором: экспонента с полным джиттером."""
+    ceiling = min(
+        API_RETRY_BACKOFF_MAX, API_RETRY_BACKOFF * 2 ** (attempt - 1)
     )
+    return random.uniform(0, ceiling)
+
+
+def _request_once(request_kwargs, session):
+    """Выполняет одну попытку запроса к API и учитывает ее в метриках.
+
+    Если включен предохранитель, попытка идет через него и при
+    недоступном API сразу завершается CircuitOpenError без повторов.
+    """
+    try:
+        if API_BREAKER is None:
+            return _timed_fetch(request_kwargs, session)
+        return API_BREAKER.call(_timed_fetch, request_kwargs, session)
+    except Exception as error:
+        ERRORS.inc(type(error).__name__)
+        raise
+
+
+def _timed_fetch(request_kwargs, session):
+    """Запрашивает API и учитывает длительность попытки."""
+    with API_LATENCY.time():
+        return _fetch_json(request_kwargs, session)
+
 
+def _fetch_json(request_kwargs, session):
+    """Запрашивает API и возвращает разобранное тело успешного ответа."""
     try:
-        response = requests.get(**request_kwargs)
+        response = (session or requests).get(**request_kwargs)
     except requests.RequestException as e:
         raise ApiRequestException(
             f'Ошибка при запросе к API: {e}'
         )
-    if response .status_code != HTTPStatus.OK:
+    if response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        raise ApiServerError(
+            f'API вернул код ответа: {response.status_code}'
+        )
+    if response.status_code != HTTPStatus.OK:
         raise APIResponseError(
             f'API вернул код ответа: {response.status_code}'
         )
-    logger.info('Бот получил ответ от API')
+    if request_kwargs.get('stream'):
+        return HomeworkStream(_read_body(response))
+    return decode_response(response)
+
+
+def _read_body(response):
+    """Читает тело ответа кусками по API_STREAM_CHUNK_SIZE байт."""
+    try:
+        yield from response.iter_content(chunk_size=API_STREAM_CHUNK_SIZE)
+    except requests.RequestException as e:
+        raise ApiRequestException(f'Ошибка при чтении ответа API: {e}')
+    finally:
+        response.close()
+
+
+def decode_response(response):
+    """Разбирает тело ответа API прямо из байтов декодером JSON_LOADS.
+
+    Ответ без байтового тела разбирается его собственным методом json().
+    """
+    content = getattr(response, 'content', None)
+    if isinstance(content, bytes):
+        return decode_json(content)
     return response.json()
 
 
-def check_response(response):
-    """Проверяет корректность ответа API."""
-    if not isinstance(response, dict):
-        raise TypeError('Ответ API не является словарем')
+def decode_json(content):
+    """Разбирает байты JSON декодером, выбранным в JSON_LOADS."""
+    return JSON_LOADS(content)
 
-    if 'homeworks' not in response:
-        raise KeyError('Отсутствует ключ "homeworks" в ответе API')
 
-    if not isinstance(response['homeworks'], list):
-        raise TypeError('Значение ключа "homeworks" не является списком')
+def check_response(response):
+    """Проверяет корректность ответа API.
 
-    return response['homeworks']
+    Возвращает список работ в виде моделей Homework. С LOG_PAYLOADS
+    работы из ответа пишутся в лог целиком, с комментарием ревьюера:
+    дальше бот работает только с моделями. Потоковый режим работы
+    целиком не хранит и не пишет.
+    """
+    if LOG_PAYLOADS and isinstance(response, dict):
+        for payload in response.get('homeworks') or ():
+            logger.debug('Работа из ответа API: %s', payload)
+    return ApiResponse.from_dict(response).homeworks
 
 
 def parse_status(homework):
     """Излекает информацию о конкретной домашней работе."""
     """Статусы этой домашки."""
-    logging.debug(
-        f'Бот извлекает информацию о конкретной домашней работе: {homework}'
+    if not isinstance(homework, Homework):
+        homework = Homework.from_dict(homework)
+    logger.debug(
+        'Бот извлекает информацию о конкретной домашней работе: %s',
+        homework
     )
-    if 'homework_name' not in homework:
-        raise ValueError('Отсутствует название домашней работы')
-
-    if 'status' not in homework:
-        raise ValueError('Отсутствует статус домашней работы')
-
-    homework_name = homework['homework_name']
-    homework_status = homework['status']
+    homework_name = homework.homework_name
+    homework_status = homework.status
 
     if homework_status not in HOMEWORK_VERDICTS:
         raise UnknownHomeworkStatusError(
@@ -151,6 +443,267 @@ def parse_status(homework):
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
+STATUS_MESSAGE = re.compile(r'Изменился статус проверки работы "(.*)"\. ')
+
+
+def message_key(message):
+    """Название работы из сообщения parse_status или None."""
+    match = STATUS_MESSAGE.match(message)
+    return match and match.group(1)
+
+
+COALESCE = get_coalescer(NOTIFY_COALESCE, key=message_key)
+
+
+def make_messages(homeworks, index):
+    """Формирует сообщения о новых статусах работ.
+
+    Возвращает пары (работа, сообщение) от старых изменений к новым;
+    для ответа без работ работа в паре — None.
+    """
+    if not homeworks:
+        message = 'Домашних работ нет'
+        logger.debug(message)
+        return [(None, message)]
+    return [
+        (homework, parse_status(homework))
+        for homework in index.changes(homeworks)
+    ]
+
+
+def stream_messages(stream, index, changed):
+    """Выдает сообщения о новых статусах после разбора ответа.
+
+    Ответ читается потоково, в памяти остаются только изменившиеся
+    работы: они добавляются в changed в порядке API, а сообщения
+    выдаются, как и в make_messages(), от старых изменений к новым.
+    """
+    empty = True
+    for homework in stream:
+        empty = False
+        if index.is_changed(homework):
+            changed.append(homework)
+    if empty:
+        message = 'Домашних работ нет'
+        logger.debug(message)
+        yield None, message
+    for homework in index.changes(changed):
+        yield homework, parse_status(homework)
+
+
+def fetch_messages(tenant, session=None, stream=False):
+    """Запрашивает API для ученика и готовит сообщения о новых статусах.
+
+    Возвращает ответ, список работ и пары (работа, сообщение). В
+    потоковом режиме сообщения выдаются после чтения ответа, а в
+    список попадают только изменившиеся работы.
+    """
+    response = request_api(tenant.from_date, tenant.headers, session, stream)
+    if not stream:
+        homeworks = check_response(response)
+        return response, homeworks, make_messages(homeworks, tenant.index)
+    homeworks = []
+    return (
+        response,
+        homeworks,
+        stream_messages(response, tenant.index, homeworks)
+    )
+
+
+def poll_tenant(tenant, send, session=None, stream=False):
+    """Выполняет одну итерацию опроса API для ученика.
+
+    О повторах одной ошибки ученик не узнает до конца сбоя, а после
+    него получает итог со счетчиком скрытых повторов.
+    Возвращает список работ из ответа или None, если опрос не удался.
+    """
+    homeworks = None
+    try:
+        response, homeworks, messages = fetch_messages(
+            tenant, session, stream
+        )
+
+        for homework, message in messages:
+            if message != tenant.last_message:
+                send(message)
+                tenant.last_message = message
+                logger.info('Бот отправил сообщение: %s', message)
+            if homework is not None:
+                tenant.index.record(homework)
+
+        tenant.from_date = response.get('current_date', tenant.from_date)
+        summary = tenant.errors.resolve()
+        if summary is not None:
+            send(summary)
+            logger.info('Бот отправил сообщение: %s', summary)
+
+    except SendMessageError as send_err:
+        logger.error('Ошибка отправки сообщения: %s', send_err)
+
+    except Exception as error:
+        report_error(tenant, send, error)
+    return homeworks
+
+
+def report_error(tenant, send, error):
+    """Пишет ошибку опроса в лог и сообщает о ней, если это не повтор."""
+    logger.error('Сбой в работе программы: %s', error)
+    message = tenant.errors.report(error)
+    if message is None:
+        return
+    try:
+        send(message)
+    except SendMessageError as send_err:
+        logger.error('Ошибка отправки сообщения: %s', send_err)
+
+
+def open_state_store():
+    """Открывает хранилище состояния по настройкам окружения."""
+    return StateStore(
+        STATE_DB,
+        synchronous=STATE_SYNCHRONOUS,
+        flush_every=STATE_FLUSH_EVERY,
+        flush_interval=STATE_FLUSH_INTERVAL
+    )
+
+
+def open_outbox():
+    """Открывает журнал исходящих сообщений по настройкам окружения."""
+    return Outbox(
+        OUTBOX_DB,
+        synchronous=STATE_SYNCHRONOUS,
+        retry_delay=OUTBOX_RETRY_DELAY,
+        max_retry_delay=OUTBOX_MAX_RETRY_DELAY,
+        max_attempts=OUTBOX_MAX_ATTEMPTS
+    )
+
+
+def load_tenant(store):
+    """Создает ученика по переменным окружения и восстанавливает его.
+
+    В ученике хранится состояние опроса: метка времени и последнее
+    сообщение.
+    """
+    tenant = Tenant(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)
+    tenant.errors = ErrorSuppressor(ERROR_SUPPRESS_WINDOW, CLOCK.monotonic)
+    for chat_id in TELEGRAM_SUBSCRIBERS:
+        tenant.subscribe(chat_id)
+    if store.restore([tenant]):
+        logger.info(f'Опрос продолжается с метки {tenant.from_date}')
+    return tenant
+
+
+def open_leases():
+    """Открывает базу аренд, если процессов бота несколько.
+
+    Процесс, получивший аренду, продолжает с состояния и журнала
+    предыдущего владельца, поэтому с базами в памяти бот не стартует.
+    """
+    if not LEASE_DB:
+        return None
+    if ':memory:' in (STATE_DB, OUTBOX_DB):
+        logger.critical(
+            'LEASE_DB задана, а STATE_DB или OUTBOX_DB нет: процессы '
+            'не увидят состояние и журнал сообщений друг друга'
+        )
+        sys.exit(1)
+    return LeaseStore(LEASE_DB, ttl=LEASE_TTL)
+
+
+def take_lead(leader, store, tenant):
+    """Продлевает лидерство процесса до следующего опроса.
+
+    Аренда берется с запасом POLL_CEILING + LEASE_TTL: если ведущий
+    пропадет, резервный процесс начнет опрос не позже чем через
+    LEASE_TTL после пропущенного срока. Став ведущим, процесс
+    перечитывает состояние, которое сохранил предыдущий. Сбой базы
+    аренд или состояния не останавливает бота: до следующей попытки
+    процесс ждет, как резервный.
+    """
+    try:
+        leading = leader.elect(POLL_CEILING + LEASE_TTL)
+    except Exception as error:
+        logger.error('Не удалось продлить лидерство: %s', error)
+        if leader.lapse():
+            logger.warning(
+                'Аренда лидерства могла истечь, опрос приостановлен'
+            )
+        return False
+    if leader.changed and leading:
+        try:
+            store.restore([tenant])
+        except Exception as error:
+            logger.error('Не удалось восстановить состояние: %s', error)
+            # Состояние перечитается при следующем продлении
+            leader.leading = False
+            return False
+        logger.info('Процесс ведет опрос с метки %s', tenant.from_date)
+    elif leader.changed:
+        logger.warning('Опрос ведет другой процесс, этот ждет в резерве')
+    return leading
+
+
+def poll_once(bot, tenant, session, interval, store, outbox):
+    """Опрашивает API, отправляет сообщения и возвращает паузу.
+
+    Сбой хранилища или журнала не останавливает бота: он пишется в
+    лог, а пауза до следующего опроса увеличивается.
+    """
+    homeworks = None
+    try:
+        homeworks = poll_tenant(
+            tenant, partial(outbox.add_many, tenant.chat_ids), session,
+            API_STREAM
+        )
+        store.save(tenant)
+        deliver_outbox(bot, outbox)
+    except Exception as error:
+        homeworks = None
+        logger.error('Сбой хранилища или журнала сообщений: %s', error)
+    delay = interval.update(homeworks)
+    logger.info('Следующий запрос к API через %s с', delay)
+    return delay
+
+
+def deliver_outbox(bot, outbox):
+    """Отправляет ждущие сообщения журнала и удаляет доставленные."""
+    _, failed = outbox.deliver(
+        partial(send_to_subscriber, bot), coalesce=COALESCE
+    )
+    if failed:
+        logger.error(f'Не отправлено сообщений: {failed}, повтор позже')
+    outbox.compact()
+
+
+def drain_outbox(bot, outbox):
+    """Отправляет пачками все, что можно доставить из журнала."""
+    while outbox.deliver(
+        partial(send_to_subscriber, bot), coalesce=COALESCE
+    )[0]:
+        pass
+
+
+def stop_bot(bot, store, outbox, timeout=None):
+    """Сохраняет состояние и доотправляет сообщения перед выходом.
+
+    На отправку дается не больше timeout секунд (по умолчанию
+    SHUTDOWN_TIMEOUT). Недоставленное остается в журнале и уходит
+    сразу после перезапуска.
+    """
+    store.close()
+    if timeout is None:
+        timeout = SHUTDOWN_TIMEOUT
+    if run_with_timeout(drain_outbox, timeout, bot, outbox):
+        outbox.compact()
+        outbox.close()
+    else:
+        logger.warning(
+            f'Сообщения не доотправлены за {timeout} с, '
+            'они уйдут после перезапуска'
+        )
+    logger.info('Бот остановлен')
+
+
 def main():
     """Основная логика работы бота."""
     if not check_tokens():
@@ -158,39 +711,45 @@ def main():
         sys.exit(1)
     # Создаем объект класса бота
     bot = telebot.TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    last_message = ''  # Переменная для хранения последнего сообщения
-
-    while True:
+    store = open_state_store()
+    tenant = load_tenant(store)
+    # Раз в RETRY_PERIOD соединение все равно закрывается сервером,
+    # поэтому пул включается только явно через API_POOL_SIZE
+    session = create_session() if os.getenv('API_POOL_SIZE') else None
+    interval = AdaptiveInterval(POLL_FLOOR, POLL_CEILING, POLL_BACKOFF)
+    # Сообщения сначала сохраняются и только потом отправляются
+    outbox = open_outbox()
+    QUEUE_DEPTH.function = outbox.pending
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+        logger.info(f'Метрики доступны на порту {METRICS_PORT}')
+    # Из нескольких процессов опрашивает и отправляет только ведущий
+    leader = Leader(open_leases())
+    planned = None
+
+    with GracefulShutdown() as shutdown:
         try:
-            response = get_api_answer(timestamp)
-            homeworks = check_response(response)
-
-            if homeworks:
-                message = parse_status(homeworks[0])
-            else:
-                message = 'Домашних работ нет'
-                logging.debug(message)
-
-            if message != last_message:
-                send_message(bot, message)
-                last_message = message
-                logger.info(f'Бот отправил сообщение: {message}')
-
-            timestamp = response.get('current_date', timestamp)
-
-        except SendMessageError as send_err:
-            logger.error(f'Ошибка отправки сообщения: {send_err}')
-
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message)
-            if message != last_message:
-                send_message(bot, message)
-                last_message = message
-
-        finally:
-            time.sleep(RETRY_PERIOD)
+            while True:
+                started = time.monotonic()
+                delay = RETRY_PERIOD
+                try:
+                    if take_lead(leader, store, tenant):
+                        if planned is not None:
+                            LOOP_LAG.observe(max(0.0, started - planned))
+                        delay = poll_once(
+                            bot, tenant, session, interval, store, outbox
+                        )
+                        planned = started + delay
+                    else:
+                        delay, planned = LEASE_TTL / 3, None
+                finally:
+                    with shutdown.interruptible():
+                        time.sleep(delay)
+        except ShutdownRequested as reason:
+            logger.info(f'{reason}: бот останавливается')
+    if leader.leading:
+        stop_bot(bot, store, outbox)
+    leader.resign()
 
 
 if __name__ == '__main__':
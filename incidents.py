@@ -0,0 +1,83 @@
+"""Сообщения об ошибках опроса без повторов в чат."""
+import re
+import time
+
+# Изменчивые части текста ошибки: адреса объектов, UUID и числа
+VOLATILE = re.compile(
+    r'0x[0-9a-f]+'
+    r'|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+    r'|\d+(?:\.\d+)?',
+    re.IGNORECASE
+)
+
+
+def fingerprint(error):
+    """Отпечаток ошибки: класс и текст без изменчивых подробностей.
+
+    Ошибки, которые отличаются только кодом ответа, меткой времени
+    в адресе запроса или адресом объекта, получают один отпечаток.
+    """
+    text = ' '.join(VOLATILE.sub('#', str(error)).split()).lower()
+    return f'{type(error).__name__}: {text}'
+
+
+class ErrorSuppressor:
+    """Решает, какие ошибки опроса сообщать ученику.
+
+    Об ошибке сообщается один раз, повторы с тем же отпечатком
+    скрываются на window секунд, даже если между ними опрос проходил
+    успешно, поэтому ошибка, которая чередуется с ответами API, не
+    засыпает чат. По истечении окна сообщение повторяется с числом
+    скрытых повторов; window=0 отключает скрытие. Когда опрос снова
+    проходит, resolve() один раз возвращает итог сбоя, если повторы
+    скрывались. После итога ученик считает сбой устраненным, поэтому
+    отпечатки забываются и о новом сбое сообщается сразу.
+    """
+
+    def __init__(self, window=3600, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        # Отпечаток -> [время последнего сообщения, скрыто с тех пор]
+        self.seen = {}
+        self.open = False
+        self.suppressed = 0
+
+    def __bool__(self):
+        """Идет ли сбой, о котором ученику уже сообщено."""
+        return self.open
+
+    def report(self, error):
+        """Учитывает ошибку и возвращает текст сообщения или None."""
+        now = self.clock()
+        key = fingerprint(error)
+        seen = self.seen.get(key)
+        if seen is not None and now - seen[0] < self.window:
+            seen[1] += 1
+            if self.open:
+                self.suppressed += 1
+            return None
+        message = f'Сбой в работе программы: {error}'
+        if seen is not None and seen[1]:
+            self.suppressed = max(0, self.suppressed - seen[1])
+            message += f' (повторов скрыто: {seen[1]})'
+        self.seen[key] = [now, 0]
+        self.open = True
+        return message
+
+    def resolve(self):
+        """Завершает сбой и возвращает итоговое сообщение или None."""
+        if not self.open:
+            return None
+        suppressed = self.suppressed
+        self.open = False
+        self.suppressed = 0
+        if suppressed:
+            # Итог уже сообщил скрытые повторы
+            self.seen.clear()
+            return f'Сбой устранен, повторов скрыто: {suppressed}'
+        now = self.clock()
+        self.seen = {
+            key: seen for key, seen in self.seen.items()
+            if now - seen[0] < self.window
+        }
+        return None
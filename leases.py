@@ -0,0 +1,207 @@
+"""Аренды в SQLite: какой процесс бота обслуживает каких учеников.
+
+Несколько процессов с одной базой аренд делят работу без посредника:
+аренда принадлежит одному владельцу, пока он продлевает ее раньше
+срока, а после пропущенного продления ее забирает другой процесс.
+"""
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+WORKER_PREFIX = 'worker:'
+PARTITION_PREFIX = 'partition:'
+
+
+def partition_of(key, partitions):
+    """Часть, к которой относится ученик с шестнадцатеричным ключом.
+
+    Ключ ученика одинаков во всех процессах, в отличие от hash().
+    """
+    return int(key, 16) % partitions
+
+
+class LeaseStore:
+    """Именованные аренды с владельцем и сроком в базе SQLite.
+
+    Захват и продление делаются одной командой INSERT ... ON CONFLICT,
+    поэтому из процессов, одновременно претендующих на аренду,
+    ее получает ровно один.
+    """
+
+    def __init__(self, path=':memory:', owner=None, ttl=30,
+                 clock=time.time):
+        self.connection = sqlite3.connect(
+            path, check_same_thread=False, timeout=ttl
+        )
+        if path != ':memory:':
+            self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS leases ('
+            'name TEXT PRIMARY KEY, owner TEXT, expires REAL)'
+        )
+        self.connection.commit()
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}'
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def acquire(self, name, ttl=None):
+        """Захватывает или продлевает аренду на ttl секунд.
+
+        Возвращает True, если аренда принадлежит этому процессу.
+        """
+        now = self.clock()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET '
+                'owner = excluded.owner, expires = excluded.expires '
+                'WHERE leases.owner = excluded.owner OR leases.expires <= ?',
+                (name, self.owner, expires, now)
+            )
+            owner, = self.connection.execute(
+                'SELECT owner FROM leases WHERE name = ?', (name,)
+            ).fetchone()
+        return owner == self.owner
+
+    def release(self, name):
+        """Отдает аренду, если она принадлежит этому процессу."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                'DELETE FROM leases WHERE name = ? AND owner = ?',
+                (name, self.owner)
+            )
+
+    def holder(self, name):
+        """Владелец действующей аренды или None."""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT owner FROM leases WHERE name = ? AND expires > ?',
+                (name, self.clock())
+            ).fetchone()
+        return row and row[0]
+
+    def count(self, prefix):
+        """Количество действующих аренд, имя которых начинается с prefix."""
+        with self.lock:
+            return self.connection.execute(
+                'SELECT COUNT(*) FROM leases '
+                'WHERE substr(name, 1, ?) = ? AND expires > ?',
+                (len(prefix), prefix, self.clock())
+            ).fetchone()[0]
+
+    def close(self):
+        """Закрывает базу."""
+        with self.lock:
+            self.connection.close()
+
+
+class Leader:
+    """Единственный ведущий процесс среди нескольких по аренде name.
+
+    Без хранилища аренд процесс всегда ведущий. После elect() флаг
+    changed сообщает, что процесс только что стал ведущим или перестал
+    им быть.
+    """
+
+    def __init__(self, leases=None, name='leader'):
+        self.leases = leases
+        self.name = name
+        self.leading = leases is None
+        self.changed = False
+        self.expires = 0
+
+    def elect(self, ttl=None):
+        """Захватывает или продлевает лидерство; True — процесс ведущий."""
+        if self.leases is None:
+            return True
+        started = self.leases.clock()
+        leading = self.leases.acquire(self.name, ttl)
+        if leading:
+            self.expires = started + (self.leases.ttl if ttl is None else ttl)
+        self.changed = leading != self.leading
+        self.leading = leading
+        return leading
+
+    def lapse(self):
+        """Учитывает неудачное продление лидерства.
+
+        Если аренда могла истечь, процесс перестает считаться ведущим:
+        ее уже мог забрать другой процесс. Возвращает True, если
+        процесс только что перестал быть ведущим.
+        """
+        if not self.leading or self.leases.clock() < self.expires:
+            return False
+        self.leading = False
+        self.changed = True
+        return True
+
+    def resign(self):
+        """Отдает лидерство, чтобы другой процесс подхватил его сразу."""
+        if self.leases is not None and self.leading:
+            self.leases.release(self.name)
+            self.leading = False
+
+
+class Partitions:
+    """Делит учеников между живыми процессами по partitions частям.
+
+    Каждый процесс продлевает свою метку жизни и старается держать
+    равную долю частей: лишние отдает, недостающие забирает у тех, кто
+    перестал продлевать аренды. Ученик обслуживается процессом,
+    который держит его часть.
+    """
+
+    def __init__(self, leases, partitions=64):
+        self.leases = leases
+        self.partitions = partitions
+        self.owned = frozenset()
+
+    def owns(self, key):
+        """Обслуживает ли процесс ученика с ключом key."""
+        return partition_of(key, self.partitions) in self.owned
+
+    def rebalance(self, on_acquired=None):
+        """Продлевает аренды и выравнивает доли процессов.
+
+        on_acquired(parts) вызывается для новых частей до того, как
+        процесс начнет их обслуживать, например чтобы перечитать
+        состояние учеников. Возвращает новые и потерянные части.
+        """
+        self.leases.acquire(WORKER_PREFIX + self.leases.owner)
+        share = math.ceil(
+            self.partitions / max(1, self.leases.count(WORKER_PREFIX))
+        )
+        kept = {part for part in self.owned if self.leases.acquire(
+            PARTITION_PREFIX + str(part)
+        )}
+        surplus = sorted(kept)[share:]
+        kept.difference_update(surplus)
+        lost = set(self.owned) - kept
+        # Процесс перестает обслуживать части раньше, чем отдает их
+        self.owned = frozenset(kept)
+        for part in surplus:
+            self.leases.release(PARTITION_PREFIX + str(part))
+        for part in range(self.partitions):
+            if len(kept) >= share:
+                break
+            if part not in kept and self.leases.acquire(
+                PARTITION_PREFIX + str(part)
+            ):
+                kept.add(part)
+        acquired = kept - self.owned
+        if acquired and on_acquired is not None:
+            on_acquired(acquired)
+        self.owned = frozenset(kept)
+        return acquired, lost
+
+    def release_all(self):
+        """Отдает все части и метку жизни процесса."""
+        for part in self.owned:
+            self.leases.release(PARTITION_PREFIX + str(part))
+        self.leases.release(WORKER_PREFIX + self.leases.owner)
+        self.owned = frozenset()
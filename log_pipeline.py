@@ -0,0 +1,132 @@
+"""Неблокирующее логирование: запись в файл и консоль в фоновом потоке."""
+import copy
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler
+)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Кладет записи в ограниченную очередь и никогда не ждет.
+
+    Когда очередь заполнена больше чем на sample_above, из записей
+    ниже keep_level проходит только каждая sample_rate-я. Если очередь
+    заполнена целиком, запись отбрасывается. Количество отброшенных
+    записей хранится в dropped.
+    """
+
+    def __init__(
+        self, log_queue, sample_above=0.8, sample_rate=10,
+        keep_level=logging.WARNING
+    ):
+        super().__init__(log_queue)
+        self.high_water = max(1, int(log_queue.maxsize * sample_above))
+        self.sample_rate = sample_rate
+        self.keep_level = keep_level
+        self.sampled = 0
+        self.dropped = 0
+        self.counter_lock = threading.Lock()
+
+    def prepare(self, record):
+        """Подставляет аргументы в сообщение, не форматируя запись.
+
+        Время, уровень и трассировку оформляет фоновый поток.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        """Кладет запись в очередь или отбрасывает ее."""
+        if (
+            record.levelno < self.keep_level
+            and self.queue.qsize() >= self.high_water
+        ):
+            with self.counter_lock:
+                self.sampled += 1
+                skip = self.sampled % self.sample_rate
+                if skip:
+                    self.dropped += 1
+            if skip:
+                return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.counter_lock:
+                self.dropped += 1
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler, который сжимает старые файлы в gzip.
+
+    Сжатие идет в отдельном потоке; следующая ротация дожидается
+    предыдущего сжатия, чтобы не переименовать недожатый файл.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.namer = self._gzip_name
+        self.rotator = self._rotate
+        self.compressor = ThreadPoolExecutor(max_workers=1)
+        self.compressing = None
+
+    def doRollover(self):
+        """Дожидается сжатия прошлого файла и выполняет ротацию."""
+        if self.compressing is not None:
+            self.compressing.result()
+        super().doRollover()
+
+    def close(self):
+        """Закрывает файл и дожидается сжатия."""
+        super().close()
+        self.compressor.shutdown(wait=True)
+
+    @staticmethod
+    def _gzip_name(name):
+        """Имя сжатой копии файла."""
+        return name + '.gz'
+
+    def _rotate(self, source, destination):
+        """Переименовывает текущий файл и сжимает его в фоне."""
+        plain = destination[:-len('.gz')]
+        os.replace(source, plain)
+        self.compressing = self.compressor.submit(
+            compress_file, plain, destination
+        )
+
+
+def compress_file(source, destination):
+    """Сжимает source в destination и удаляет исходный файл."""
+    with open(source, 'rb') as plain, gzip.open(destination, 'wb') as packed:
+        shutil.copyfileobj(plain, packed)
+    os.remove(source)
+
+
+def start_queue_logging(
+    logger, handlers, queue_size=10000, sample_above=0.8, sample_rate=10
+):
+    """Переводит logger на очередь и запускает фоновую запись.
+
+    Обработчики handlers подключаются к фоновому слушателю, а у logger
+    остается только DroppingQueueHandler. Возвращает обработчик очереди
+    и запущенный QueueListener; listener.stop() дописывает очередь.
+    """
+    handler = DroppingQueueHandler(
+        queue.Queue(maxsize=queue_size), sample_above, sample_rate
+    )
+    handler.setLevel(min(item.level for item in handlers))
+    listener = QueueListener(
+        handler.queue, *handlers, respect_handler_level=True
+    )
+    logger.addHandler(handler)
+    listener.start()
+    return handler, listener
@@ -0,0 +1,239 @@
+"""Счетчики и гистограммы работы бота в текстовом формате Prometheus."""
+import bisect
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Границы корзин в секундах: от быстрых ответов до таймаута чтения
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(names, values):
+    """Строка меток вида {name="value"} для строки метрики."""
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{value}"' for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Общая часть метрик: имя, описание и значения по наборам меток.
+
+    Значения меток передаются позиционно в порядке labels.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def render(self):
+        """Строки метрики в формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.description}',
+            f'# TYPE {self.name} {self.kind}'
+        ]
+        for suffix, names, values, value in self.samples():
+            lines.append(
+                f'{self.name}{suffix}{format_labels(names, values)} {value}'
+            )
+        return lines
+
+    def samples(self):
+        """Значения метрики: (суффикс, имена меток, значения, число)."""
+        with self.lock:
+            items = sorted(self.values.items())
+        for values, value in items:
+            yield '', self.labels, values, value
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    kind = 'counter'
+
+    def inc(self, *values, amount=1):
+        """Увеличивает счетчик для набора меток values."""
+        with self.lock:
+            self.values[values] = self.values.get(values, 0) + amount
+
+    def value(self, *values):
+        """Текущее значение счетчика."""
+        return self.values.get(values, 0)
+
+
+class Gauge(Metric):
+    """Мгновенное значение, например глубина очереди.
+
+    Вместо set() можно передать function: она вызывается только при
+    чтении метрик и ничего не стоит между чтениями.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, description, labels=(), function=None):
+        super().__init__(name, description, labels)
+        self.function = function
+
+    def set(self, value, *values):
+        """Устанавливает значение для набора меток values."""
+        with self.lock:
+            self.values[values] = value
+
+    def samples(self):
+        """Значения метрики с учетом функции."""
+        if self.function is not None:
+            yield '', (), (), self.function()
+        yield from super().samples()
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам с суммой и количеством.
+
+    observe() обходится одним бинарным поиском под блокировкой,
+    накопленные суммы по корзинам считаются только при чтении.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, amount, *values):
+        """Учитывает одно значение для набора меток values."""
+        index = bisect.bisect_left(self.buckets, amount)
+        with self.lock:
+            series = self.values.get(values)
+            if series is None:
+                series = self.values[values] = [
+                    [0] * (len(self.buckets) + 1), 0.0
+                ]
+            series[0][index] += 1
+            series[1] += amount
+
+    def time(self, *values):
+        """Контекстный менеджер, замеряющий длительность блока."""
+        return Timer(self, values)
+
+    def count(self, *values):
+        """Количество учтенных значений."""
+        series = self.values.get(values)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        """Накопленные корзины, сумма и количество для каждого набора."""
+        with self.lock:
+            items = sorted(
+                (values, (list(counts), total))
+                for values, (counts, total) in self.values.items()
+            )
+        names = self.labels + ('le',)
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield '_bucket', names, values + (bound,), cumulative
+            yield '_sum', self.labels, values, total
+            yield '_count', self.labels, values, cumulative
+
+
+class Timer:
+    """Замеряет блок with и записывает длительность в гистограмму."""
+
+    __slots__ = ('histogram', 'values', 'started')
+
+    def __init__(self, histogram, values):
+        self.histogram = histogram
+        self.values = values
+
+    def __enter__(self):
+        """Запоминает момент начала блока."""
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Записывает длительность блока, даже если он упал."""
+        self.histogram.observe(
+            time.perf_counter() - self.started, *self.values
+        )
+
+
+class Registry:
+    """Набор метрик, которые отдаются одной страницей."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        """Добавляет метрику; метрика с тем же именем возвращается как есть.
+
+        Повторная регистрация не ломает повторный импорт модулей.
+        """
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, description, labels=()):
+        """Создает и регистрирует счетчик."""
+        return self.register(Counter(name, description, labels))
+
+    def gauge(self, name, description, labels=(), function=None):
+        """Создает и регистрирует мгновенное значение."""
+        return self.register(Gauge(name, description, labels, function))
+
+    def histogram(self, name, description, labels=(),
+                  buckets=DEFAULT_BUCKETS):
+        """Создает и регистрирует гистограмму."""
+        return self.register(Histogram(name, description, labels, buckets))
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдает метрики по адресу /metrics."""
+
+    def do_GET(self):
+        """Отвечает на запрос метрик."""
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не пишет в лог каждый запрос метрик."""
+
+
+def start_metrics_server(port, host='0.0.0.0', registry=REGISTRY):
+    """Запускает HTTP-сервер метрик в фоновом потоке и возвращает его."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,76 @@
+"""Компактные модели ответа API Яндекс.Практикум."""
+
+
+class Homework:
+    """Домашняя работа: только поля, которые нужны боту.
+
+    Остальные поля ответа, например комментарий ревьюера, не хранятся,
+    поэтому индекс статусов и очередь уведомлений не держат в памяти
+    исходные словари.
+    """
+
+    __slots__ = ('id', 'homework_name', 'status', 'date_updated')
+
+    def __init__(self, homework_name, status, id=None, date_updated=None):
+        self.id = id
+        self.homework_name = homework_name
+        self.status = status
+        self.date_updated = date_updated
+
+    @classmethod
+    def from_dict(cls, data):
+        """Проверяет работу из ответа API и создает модель за один проход.
+
+        Выбрасывает те же исключения, что и parse_status для словаря.
+        """
+        if not isinstance(data, dict):
+            raise TypeError('Домашняя работа не является словарем')
+        if 'homework_name' not in data:
+            raise ValueError('Отсутствует название домашней работы')
+        if 'status' not in data:
+            raise ValueError('Отсутствует статус домашней работы')
+        return cls(
+            data['homework_name'],
+            data['status'],
+            data.get('id'),
+            data.get('date_updated')
+        )
+
+    @property
+    def key(self):
+        """Ключ работы: id, а при его отсутствии название."""
+        return self.homework_name if self.id is None else self.id
+
+    def __repr__(self):
+        """Представление для логов."""
+        return (
+            f'Homework(id={self.id!r}, homework_name={self.homework_name!r}, '
+            f'status={self.status!r}, date_updated={self.date_updated!r})'
+        )
+
+
+class ApiResponse:
+    """Проверенный ответ API: список работ и метка времени ответа."""
+
+    __slots__ = ('homeworks', 'current_date')
+
+    def __init__(self, homeworks, current_date=None):
+        self.homeworks = homeworks
+        self.current_date = current_date
+
+    @classmethod
+    def from_dict(cls, data):
+        """Проверяет структуру ответа и переводит работы в модели."""
+        if not isinstance(data, dict):
+            raise TypeError('Ответ API не является словарем')
+
+        if 'homeworks' not in data:
+            raise KeyError('Отсутствует ключ "homeworks" в ответе API')
+
+        if not isinstance(data['homeworks'], list):
+            raise TypeError('Значение ключа "homeworks" не является списком')
+
+        return cls(
+            [Homework.from_dict(item) for item in data['homeworks']],
+            data.get('current_date')
+        )
@@ -0,0 +1,227 @@
+"""Отправка сообщений в Telegram через очередь с ограничением скорости."""
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from http import HTTPStatus
+
+from exceptions import SendMessageError
+
+STOP = object()
+# Как часто отправитель проверяет очередь, пока ждет лимита чата
+IDLE_SLICE = 0.05
+
+
+class TokenBucket:
+    """Ограничитель скорости: rate токенов в секунду, запас capacity.
+
+    Токены выдаются в долг: reserve() сразу списывает токен и сообщает,
+    сколько нужно подождать, поэтому ожидающие не крутятся в цикле.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Берет токен и возвращает время ожидания в секундах."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+def get_retry_after(error):
+    """Возвращает паузу из ответа 429 Telegram или None."""
+    cause = error.__cause__
+    if getattr(cause, 'error_code', None) != HTTPStatus.TOO_MANY_REQUESTS:
+        return None
+    parameters = (getattr(cause, 'result_json', None) or {}).get(
+        'parameters', {}
+    )
+    return parameters.get('retry_after', 1)
+
+
+class Notifier:
+    """Очередь исходящих сообщений с пулом отправителей.
+
+    Сообщения одного чата всегда попадают к одному отправителю, поэтому
+    их порядок сохраняется. Скорость ограничена общим лимитом бота и
+    лимитом каждого чата, ответ 429 приостанавливает все отправки на
+    retry_after секунд. Сообщение, которое упирается в лимит своего
+    чата, откладывается в кучу отправителя до своего срока, и
+    отправитель тем временем обслуживает другие чаты. Ошибки отправки
+    не доходят до опроса, а передаются в on_error(chat_id, text, error,
+    message_id); об успехе сообщает on_sent(message_id).
+    """
+
+    def __init__(
+        self, send, workers=4, queue_size=10000, global_rate=30,
+        chat_rate=1, max_retries=3, on_sent=None, on_error=None,
+        sleep=time.sleep,
+        clock=time.monotonic, logger=None
+    ):
+        self.send = send
+        self.queues = [
+            queue.Queue(maxsize=max(1, queue_size // workers))
+            for _ in range(workers)
+        ]
+        self.global_bucket = TokenBucket(global_rate, clock=clock)
+        self.chat_rate = chat_rate
+        self.chat_buckets = {}
+        self.buckets_lock = threading.Lock()
+        self.max_retries = max_retries
+        self.on_sent = on_sent
+        self.on_error = on_error or self._log_error
+        self.sleep = sleep
+        self.clock = clock
+        self.logger = logger or logging.getLogger(__name__)
+        self.paused_until = 0
+        self.counter = itertools.count()
+        self.sent = 0
+        self.failed = 0
+        self.threads = [
+            threading.Thread(
+                target=self._work, args=(worker_queue,), daemon=True
+            )
+            for worker_queue in self.queues
+        ]
+
+    def start(self):
+        """Запускает отправителей."""
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def qsize(self):
+        """Количество сообщений, ждущих отправки."""
+        return sum(worker_queue.qsize() for worker_queue in self.queues)
+
+    def submit(self, chat_id, text, message_id=None):
+        """Ставит сообщение в очередь, не блокируя вызывающего.
+
+        Если очередь заполнена, выбрасывает SendMessageError.
+        """
+        try:
+            self._queue_for(chat_id).put_nowait(
+                (chat_id, text, message_id, 0)
+            )
+        except queue.Full:
+            raise SendMessageError(
+                'Очередь исходящих сообщений переполнена'
+            )
+
+    def join(self):
+        """Ждет, пока очередь опустеет."""
+        for worker_queue in self.queues:
+            worker_queue.join()
+
+    def close(self, timeout=None):
+        """Отправляет оставшиеся сообщения и останавливает отправителей."""
+        for worker_queue in self.queues:
+            worker_queue.put(STOP)
+        deadline = None if timeout is None else self.clock() + timeout
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join(
+                    None if deadline is None
+                    else max(0, deadline - self.clock())
+                )
+
+    def _queue_for(self, chat_id):
+        """Очередь отправителя, закрепленного за чатом."""
+        return self.queues[hash(chat_id) % len(self.queues)]
+
+    def _chat_bucket(self, chat_id):
+        """Ограничитель скорости для чата."""
+        with self.buckets_lock:
+            bucket = self.chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = TokenBucket(self.chat_rate, clock=self.clock)
+                self.chat_buckets[chat_id] = bucket
+            return bucket
+
+    def _work(self, worker_queue):
+        """Цикл отправителя.
+
+        Сообщение из очереди сразу занимает место в лимите своего чата
+        и ждет этого срока в куче delayed; task_done() вызывается после
+        отправки, чтобы join() дожидался и отложенных сообщений.
+        """
+        delayed = []
+        stopping = False
+        while True:
+            if delayed and delayed[0][0] <= self.clock():
+                self._send_delayed(worker_queue, delayed)
+                continue
+            if stopping and not delayed:
+                worker_queue.task_done()
+                return
+            try:
+                if delayed or stopping:
+                    item = worker_queue.get_nowait()
+                else:
+                    item = worker_queue.get()
+            except queue.Empty:
+                self._wait(
+                    min(delayed[0][0] - self.clock(), IDLE_SLICE)
+                )
+                continue
+            if item is STOP:
+                stopping = True
+                continue
+            ready = self.clock() + self._chat_bucket(item[0]).reserve()
+            heapq.heappush(delayed, (ready, next(self.counter), item))
+
+    def _send_delayed(self, worker_queue, delayed):
+        """Отправляет сообщение, срок которого наступил."""
+        _, _, item = heapq.heappop(delayed)
+        try:
+            self._deliver(*item)
+        finally:
+            worker_queue.task_done()
+
+    def _deliver(self, chat_id, text, message_id, attempt):
+        """Отправляет сообщение с учетом общего лимита и ответов 429."""
+        self._wait(self.global_bucket.reserve())
+        self._wait(self.paused_until - self.clock())
+        try:
+            self.send(chat_id, text)
+        except SendMessageError as error:
+            retry_after = get_retry_after(error)
+            if retry_after is None or attempt >= self.max_retries:
+                self.failed += 1
+                self.on_error(chat_id, text, error, message_id)
+                return
+            self.logger.warning(
+                f'Telegram ограничил отправку на {retry_after} с'
+            )
+            self.paused_until = max(
+                self.paused_until, self.clock() + retry_after
+            )
+            self._deliver(chat_id, text, message_id, attempt + 1)
+        else:
+            self.sent += 1
+            if self.on_sent is not None:
+                self.on_sent(message_id)
+
+    def _wait(self, delay):
+        """Спит delay секунд, если это нужно."""
+        if delay > 0:
+            self.sleep(delay)
+
+    def _log_error(self, chat_id, text, error, message_id):
+        """Обработчик ошибок по умолчанию: запись в лог."""
+        self.logger.error(
+            f'Ошибка отправки сообщения в чат {chat_id}: {error}'
+        )
@@ -0,0 +1,259 @@
+"""Надежная доставка уведомлений: сообщения сохраняются до отправки."""
+import sqlite3
+import threading
+import time
+from http import HTTPStatus
+
+from exceptions import SendMessageError
+
+# delivered: 0 — ждет отправки, 1 — доставлено, DEAD — отправка прекращена
+DEAD = 2
+# Дальше пауза между повторами все равно упирается в max_retry_delay,
+# а сдвиг на большее число бит переполняет целые SQLite
+MAX_BACKOFF_SHIFT = 20
+
+
+def is_permanent(error):
+    """Отказ Telegram, который не исправится повтором.
+
+    Ответы 4xx, кроме 429, означают, что бот заблокирован, чат удален
+    или запрос неверен; сетевые ошибки и 5xx стоит повторить.
+    """
+    code = getattr(error.__cause__, 'error_code', None)
+    return (
+        isinstance(code, int) and 400 <= code < 500
+        and code != HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+
+class Delivery:
+    """Записи журнала, которые уходят одной или несколькими отправками.
+
+    Сводка чата может не поместиться в одно сообщение Telegram. Записи
+    подтверждаются, только когда ушли все части, а при сбое любой
+    части откладываются на повтор целиком.
+    """
+
+    def __init__(self, message_ids, parts=1):
+        self.message_ids = tuple(message_ids)
+        self.parts = parts
+        self.failed = False
+        self.lock = threading.Lock()
+
+    def complete(self):
+        """Отмечает отправленную часть.
+
+        Возвращает номера записей, когда ушла последняя часть, иначе
+        пустой кортеж.
+        """
+        with self.lock:
+            self.parts -= 1
+            if self.parts or self.failed:
+                return ()
+            return self.message_ids
+
+    def fail(self):
+        """Отмечает сбой части; номера записей возвращаются один раз."""
+        with self.lock:
+            if self.failed:
+                return ()
+            self.failed = True
+            return self.message_ids
+
+
+class Outbox:
+    """Журнал исходящих сообщений в SQLite с доставкой хотя бы раз.
+
+    Сообщение записывается до отправки и помечается доставленным только
+    после успеха. Неудачные отправки повторяются пачками с растущей
+    паузой, доставленные записи удаляет compact(). После max_attempts
+    неудач (0 — без предела) или окончательного отказа сообщение
+    больше не отправляется и остается в журнале, см. dead().
+    """
+
+    def __init__(
+        self, path=':memory:', synchronous='NORMAL', retry_delay=30,
+        max_retry_delay=3600, clock=time.time, max_attempts=0
+    ):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(f'PRAGMA synchronous={synchronous}')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id TEXT, text TEXT, '
+            'attempts INTEGER DEFAULT 0, next_attempt REAL, '
+            'delivered INTEGER DEFAULT 0)'
+        )
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS outbox_due '
+            'ON outbox (delivered, next_attempt)'
+        )
+        self.connection.commit()
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def add(self, chat_id, text, lease=0):
+        """Сохраняет сообщение и возвращает его номер.
+
+        lease откладывает повторную выдачу через claim(), пока сообщение
+        отправляется сразу после записи.
+        """
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO outbox (chat_id, text, next_attempt) '
+                'VALUES (?, ?, ?)',
+                (str(chat_id), text, self.clock() + lease)
+            )
+        return cursor.lastrowid
+
+    def add_many(self, chat_ids, text, lease=0):
+        """Сохраняет одно сообщение для нескольких чатов одной транзакцией.
+
+        Возвращает номера записей в порядке chat_ids.
+        """
+        next_attempt = self.clock() + lease
+        with self.lock, self.connection:
+            return [
+                self.connection.execute(
+                    'INSERT INTO outbox (chat_id, text, next_attempt) '
+                    'VALUES (?, ?, ?)',
+                    (str(chat_id), text, next_attempt)
+                ).lastrowid
+                for chat_id in chat_ids
+            ]
+
+    def claim(self, limit=100, lease=60):
+        """Выдает пачку сообщений, которые пора отправить.
+
+        На время lease выданные сообщения не попадут в следующую пачку.
+        """
+        now = self.clock()
+        with self.lock, self.connection:
+            rows = self.connection.execute(
+                'SELECT id, chat_id, text FROM outbox '
+                'WHERE delivered = 0 AND next_attempt <= ? '
+                'ORDER BY id LIMIT ?',
+                (now, limit)
+            ).fetchall()
+            self.connection.executemany(
+                'UPDATE outbox SET next_attempt = ? WHERE id = ?',
+                [(now + lease, row[0]) for row in rows]
+            )
+        return rows
+
+    def ack(self, message_id):
+        """Помечает сообщение доставленным."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                'UPDATE outbox SET delivered = 1 WHERE id = ?', (message_id,)
+            )
+
+    def fail(self, message_id, permanent=False):
+        """Откладывает повтор сообщения с экспоненциальной паузой.
+
+        С permanent=True или после max_attempts неудач сообщение
+        больше не отправляется. Возвращает True, если повторов не будет.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                'UPDATE outbox SET attempts = attempts + 1, '
+                'next_attempt = ? + MIN(?, ? * (1 << MIN(attempts, ?))), '
+                'delivered = CASE WHEN ? OR (? > 0 AND attempts + 1 >= ?) '
+                'THEN ? ELSE delivered END '
+                'WHERE id = ?',
+                (
+                    self.clock(), self.max_retry_delay, self.retry_delay,
+                    MAX_BACKOFF_SHIFT, permanent, self.max_attempts,
+                    self.max_attempts, DEAD, message_id
+                )
+            )
+            row = self.connection.execute(
+                'SELECT delivered FROM outbox WHERE id = ?', (message_id,)
+            ).fetchone()
+        return row is not None and row[0] == DEAD
+
+    def claim_batches(self, limit=100, lease=60, coalesce=None):
+        """Выдает ждущие сообщения пачками по чатам.
+
+        Возвращает список (номера, chat_id, тексты). Без coalesce каждая
+        пачка — одно сообщение. С coalesce сообщения чата из выдачи
+        сводятся функцией coalesce(texts) в тексты на отправку, а
+        номера всех исходных сообщений остаются в пачке.
+        """
+        rows = self.claim(limit, lease)
+        if coalesce is None:
+            return [
+                ((message_id,), chat_id, [text])
+                for message_id, chat_id, text in rows
+            ]
+        chats = {}
+        for message_id, chat_id, text in rows:
+            message_ids, texts = chats.setdefault(chat_id, ([], []))
+            message_ids.append(message_id)
+            texts.append(text)
+        return [
+            (tuple(message_ids), chat_id, coalesce(texts))
+            for chat_id, (message_ids, texts) in chats.items()
+        ]
+
+    def deliver(self, send, limit=100, coalesce=None):
+        """Отправляет пачку ждущих сообщений через send(chat_id, text).
+
+        После первой ошибки в чате его следующие сообщения не
+        отправляются, чтобы не нарушить порядок. С coalesce сообщения
+        каждого чата сводятся перед отправкой, см. claim_batches().
+        Возвращает количество доставленных и неудачных сообщений.
+        """
+        delivered = failed = 0
+        blocked = set()
+        for message_ids, chat_id, texts in self.claim_batches(
+            limit, 0, coalesce
+        ):
+            if chat_id in blocked:
+                continue
+            try:
+                for text in texts:
+                    send(chat_id, text)
+            except SendMessageError as error:
+                for message_id in message_ids:
+                    self.fail(message_id, is_permanent(error))
+                blocked.add(chat_id)
+                failed += len(message_ids)
+            else:
+                for message_id in message_ids:
+                    self.ack(message_id)
+                delivered += len(message_ids)
+        return delivered, failed
+
+    def pending(self):
+        """Количество недоставленных сообщений."""
+        with self.lock:
+            return self.connection.execute(
+                'SELECT COUNT(*) FROM outbox WHERE delivered = 0'
+            ).fetchone()[0]
+
+    def dead(self):
+        """Количество сообщений, отправка которых прекращена."""
+        with self.lock:
+            return self.connection.execute(
+                'SELECT COUNT(*) FROM outbox WHERE delivered = ?', (DEAD,)
+            ).fetchone()[0]
+
+    def compact(self):
+        """Удаляет доставленные сообщения и возвращает их количество."""
+        with self.lock:
+            with self.connection:
+                removed = self.connection.execute(
+                    'DELETE FROM outbox WHERE delivered = 1'
+                ).rowcount
+            self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return removed
+
+    def close(self):
+        """Закрывает базу."""
+        with self.lock:
+            self.connection.close()
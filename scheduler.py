@@ -0,0 +1,178 @@
+"""Планирование опросов API."""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REVIEW_STATUS = 'reviewing'
+
+
+class AdaptiveInterval:
+    """Подбирает паузу до следующего опроса по его результату.
+
+    Пока работа на проверке или статус только что изменился, опрос идет
+    с минимальной паузой. Пустые ответы и ошибки шаг за шагом
+    увеличивают паузу до потолка.
+    """
+
+    def __init__(self, floor, ceiling, factor=2):
+        if floor > ceiling:
+            raise ValueError('Нижняя граница паузы больше верхней')
+        self.floor = floor
+        self.ceiling = ceiling
+        self.factor = factor
+        self.current = floor
+        self.in_review = set()
+
+    def update(self, homeworks):
+        """Возвращает паузу до следующего опроса.
+
+        homeworks — список моделей Homework из ответа API или None,
+        если опрос завершился ошибкой.
+        """
+        if homeworks is None:
+            return self._back_off()
+        for homework in homeworks:
+            if homework.status == REVIEW_STATUS:
+                self.in_review.add(homework.key)
+            else:
+                self.in_review.discard(homework.key)
+        if homeworks or self.in_review:
+            self.current = self.floor
+            return self.current
+        return self._back_off()
+
+    def _back_off(self):
+        """Увеличивает паузу, не выходя за потолок."""
+        self.current = min(self.ceiling, self.current * self.factor)
+        return self.current
+
+
+class DeadlineScheduler:
+    """Запускает задачу для каждого элемента к его сроку.
+
+    Сроки хранятся в min-куче, созревшие элементы передаются в пул
+    потоков ограниченного размера. Задача возвращает паузу до своего
+    следующего запуска, после чего элемент снова попадает в кучу.
+    Если задача выбросила исключение, элемент запускается снова через
+    error_delay секунд, а ошибка передается в on_error(item, error).
+    Если передан on_lag, он получает опоздание каждого запуска в
+    секундах.
+    """
+
+    def __init__(
+        self, task, workers, clock=time.monotonic, sleep=time.sleep,
+        on_lag=None, on_error=None, error_delay=60
+    ):
+        self.task = task
+        self.clock = clock
+        self.sleep = sleep
+        self.on_lag = on_lag
+        self.on_error = on_error
+        self.error_delay = error_delay
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(workers)
+        self.condition = threading.Condition()
+        self.heap = []
+        self.counter = itertools.count()
+        self.running = True
+
+    def __len__(self):
+        """Количество элементов, ожидающих запуска."""
+        return len(self.heap)
+
+    def schedule(self, item, due):
+        """Добавляет элемент со сроком запуска due."""
+        with self.condition:
+            heapq.heappush(self.heap, (due, next(self.counter), item))
+            if self.heap[0][2] is item:
+                self.condition.notify()
+
+    def schedule_evenly(self, items, period):
+        """Равномерно распределяет первые запуски по периоду."""
+        items = list(items)
+        if not items:
+            return
+        now = self.clock()
+        step = period / len(items)
+        with self.condition:
+            for number, item in enumerate(items):
+                self.heap.append(
+                    (now + number * step, next(self.counter), item)
+                )
+            heapq.heapify(self.heap)
+            self.condition.notify()
+
+    def pop_due(self):
+        """Ждет ближайший срок и возвращает срок и созревший элемент.
+
+        Возвращает None, если планировщик остановлен.
+        """
+        with self.condition:
+            while self.running:
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                delay = self.heap[0][0] - self.clock()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                due, _, item = heapq.heappop(self.heap)
+                return due, item
+        return None
+
+    def run(self):
+        """Раздает созревшие элементы пулу, пока не вызван stop().
+
+        Опоздание запуска считается после того, как освободился поток
+        пула, поэтому в него входит и ожидание занятого пула.
+        """
+        while True:
+            popped = self.pop_due()
+            if popped is None:
+                return
+            due, item = popped
+            self.slots.acquire()
+            if self.on_lag is not None:
+                self.on_lag(max(0.0, self.clock() - due))
+            self.executor.submit(self._execute, item)
+
+    def run_inline(self, until):
+        """Выполняет задачи по очереди в текущем потоке до момента until.
+
+        Между задачами вызывает sleep(), поэтому с виртуальными часами
+        прогон недель опросов занимает секунды. Возвращает количество
+        выполненных задач.
+        """
+        executed = 0
+        while self.heap and self.heap[0][0] <= until:
+            due, _, item = heapq.heappop(self.heap)
+            self.sleep(due - self.clock())
+            self.schedule(item, self.clock() + self._run_task(item))
+            executed += 1
+        return executed
+
+    def stop(self):
+        """Останавливает раздачу элементов."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def _execute(self, item):
+        """Выполняет задачу и планирует следующий запуск элемента."""
+        delay = self.error_delay
+        try:
+            delay = self._run_task(item)
+        finally:
+            self.slots.release()
+            self.schedule(item, self.clock() + delay)
+
+    def _run_task(self, item):
+        """Выполняет задачу и возвращает паузу, даже если она упала."""
+        try:
+            return self.task(item)
+        except Exception as error:
+            if self.on_error is not None:
+                self.on_error(item, error)
+            return self.error_delay
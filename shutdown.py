@@ -0,0 +1,89 @@
+"""Плавная остановка бота по сигналам SIGTERM и SIGINT."""
+import signal
+import threading
+from contextlib import contextmanager
+
+from exceptions import ShutdownRequested
+
+SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class GracefulShutdown:
+    """Флаг остановки, который поднимают сигналы.
+
+    Внутри with сигналы не завершают процесс, а поднимают флаг:
+    текущая итерация опроса и начатые отправки доводятся до конца.
+    Ожидание внутри interruptible() прерывается сразу исключением
+    ShutdownRequested. Повторный сигнал прерывает и работу, которая
+    зависла. Обработчики ставятся только в главном потоке, а на выходе
+    возвращаются прежние.
+    """
+
+    def __init__(self, signals=SIGNALS):
+        self.signals = signals
+        self.event = threading.Event()
+        self.previous = {}
+        self.waiting = False
+        self.signum = None
+
+    def __enter__(self):
+        """Ставит обработчики сигналов."""
+        if threading.current_thread() is threading.main_thread():
+            for signum in self.signals:
+                self.previous[signum] = signal.signal(signum, self._handle)
+        return self
+
+    def __exit__(self, *exc_info):
+        """Возвращает прежние обработчики."""
+        for signum, handler in self.previous.items():
+            signal.signal(signum, handler)
+        self.previous.clear()
+
+    def is_set(self):
+        """Запрошена ли остановка."""
+        return self.event.is_set()
+
+    def set(self):
+        """Запрашивает остановку без сигнала."""
+        self.event.set()
+
+    def wait(self, timeout=None):
+        """Ждет остановки не дольше timeout секунд.
+
+        Возвращает True, если остановка запрошена; подходит для пауз
+        в фоновых потоках.
+        """
+        return self.event.wait(timeout)
+
+    @contextmanager
+    def interruptible(self):
+        """Ожидание в главном потоке, которое прерывает сигнал."""
+        if self.event.is_set():
+            raise ShutdownRequested('Остановка уже запрошена')
+        self.waiting = True
+        try:
+            yield
+        finally:
+            self.waiting = False
+
+    def _handle(self, signum, frame):
+        """Обработчик сигнала."""
+        stopping = self.event.is_set()
+        self.signum = signum
+        self.event.set()
+        if self.waiting or stopping:
+            raise ShutdownRequested(
+                f'Получен сигнал {signal.Signals(signum).name}'
+            )
+
+
+def run_with_timeout(function, timeout, *args):
+    """Выполняет function в отдельном потоке не дольше timeout секунд.
+
+    Возвращает True, если функция успела завершиться. Поток не
+    держит процесс, поэтому зависшая отправка не задерживает выход.
+    """
+    thread = threading.Thread(target=function, args=args, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
@@ -0,0 +1,185 @@
+"""Хранилище состояния опроса, переживающее перезапуски бота."""
+import sqlite3
+import threading
+import time
+
+from models import Homework
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL')
+
+
+class StateStore:
+    """Хранит метку from_date и последнее сообщение учеников в SQLite.
+
+    Там же лежат известные статусы работ, которые загружает backfill;
+    restore() переносит их в индекс ученика. Записи состояния копятся
+    в памяти и сбрасываются одной транзакцией, когда их набирается
+    flush_every или с прошлого сброса прошло flush_interval секунд.
+    Режим synchronous задает, как часто SQLite делает fsync.
+    """
+
+    def __init__(
+        self, path=':memory:', synchronous='NORMAL', flush_every=100,
+        flush_interval=5.0, clock=time.monotonic
+    ):
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f'Неизвестный режим synchronous: {synchronous}')
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(f'PRAGMA synchronous={synchronous}')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS state ('
+            'key TEXT PRIMARY KEY, from_date INTEGER, last_message TEXT)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS homeworks ('
+            'tenant TEXT, key TEXT, id INTEGER, homework_name TEXT, '
+            'status TEXT, date_updated TEXT, PRIMARY KEY (tenant, key))'
+        )
+        self.connection.commit()
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.pending = {}
+        self.clock = clock
+        self.flushed_at = clock()
+        self.lock = threading.Lock()
+
+    def restore(self, tenants):
+        """Восстанавливает сохраненное состояние учеников.
+
+        Известные статусы работ попадают в индекс ученика, чтобы о них
+        не приходили повторные уведомления. Возвращает количество
+        учеников, для которых нашлось состояние опроса.
+        """
+        with self.lock:
+            rows = {
+                key: (from_date, last_message)
+                for key, from_date, last_message in self.connection.execute(
+                    'SELECT key, from_date, last_message FROM state'
+                )
+            }
+            history = self.connection.execute(
+                'SELECT tenant, homework_name, status, id, date_updated '
+                'FROM homeworks'
+            ).fetchall()
+        restored = 0
+        by_key = {tenant.key: tenant for tenant in tenants}
+        for tenant_key, *fields in history:
+            if tenant_key in by_key:
+                by_key[tenant_key].index.record(Homework(*fields))
+        for tenant in tenants:
+            if tenant.key in rows:
+                tenant.from_date, tenant.last_message = rows[tenant.key]
+                restored += 1
+        return restored
+
+    def save_homeworks(self, tenant, homeworks):
+        """Сохраняет статусы работ ученика, не затирая более новые."""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT INTO homeworks '
+                '(tenant, key, id, homework_name, status, date_updated) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(tenant, key) DO UPDATE SET '
+                'id = excluded.id, homework_name = excluded.homework_name, '
+                'status = excluded.status, '
+                'date_updated = excluded.date_updated '
+                "WHERE IFNULL(excluded.date_updated, '') "
+                ">= IFNULL(homeworks.date_updated, '')",
+                [
+                    (
+                        tenant.key, str(homework.key), homework.id,
+                        homework.homework_name, homework.status,
+                        homework.date_updated
+                    )
+                    for homework in homeworks
+                ]
+            )
+
+    def save(self, tenant):
+        """Запоминает состояние ученика до ближайшего сброса."""
+        with self.lock:
+            self.pending[tenant.key] = (tenant.from_date, tenant.last_message)
+            if (
+                len(self.pending) >= self.flush_every
+                or self.clock() - self.flushed_at >= self.flush_interval
+            ):
+                self._flush()
+
+    def flush(self):
+        """Записывает накопленные изменения на диск."""
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        """Сбрасывает изменения и закрывает базу."""
+        with self.lock:
+            self._flush()
+            self.connection.close()
+
+    def _flush(self):
+        """Пишет накопленные изменения одной транзакцией."""
+        if self.pending:
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT INTO state (key, from_date, last_message) '
+                    'VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET '
+                    'from_date = excluded.from_date, '
+                    'last_message = excluded.last_message',
+                    [
+                        (key, from_date, last_message)
+                        for key, (from_date, last_message)
+                        in self.pending.items()
+                    ]
+                )
+            self.pending.clear()
+        self.flushed_at = self.clock()
+
+
+class HomeworkIndex:
+    """Последние известные статусы работ ученика.
+
+    Сравнивает работы из ответа API (модели Homework) с уже виденным
+    состоянием и отдает только настоящие переходы в хронологическом
+    порядке.
+    """
+
+    __slots__ = ('seen',)
+
+    def __init__(self):
+        self.seen = {}
+
+    def __len__(self):
+        """Количество известных работ."""
+        return len(self.seen)
+
+    def changes(self, homeworks):
+        """Возвращает работы с новым статусом, от старых к новым.
+
+        API отдает работы от новых к старым, поэтому в обычном случае
+        список просто разворачивается за линейное время.
+        """
+        changed = [
+            homework for homework in homeworks if self.is_changed(homework)
+        ]
+        dates = [homework.date_updated or '' for homework in changed]
+        pairs = list(zip(dates, dates[1:]))
+        if all(current >= following for current, following in pairs):
+            changed.reverse()
+        elif any(current > following for current, following in pairs):
+            changed.sort(key=lambda item: item.date_updated or '')
+        return changed
+
+    def is_changed(self, homework):
+        """Проверяет, отличается ли статус работы от известного."""
+        return self.seen.get(homework.key) != self.version(homework)
+
+    def record(self, homework):
+        """Запоминает статус работы после отправки уведомления."""
+        self.seen[homework.key] = self.version(homework)
+
+    @staticmethod
+    def version(homework):
+        """Статус работы вместе со временем его изменения."""
+        return homework.status, homework.date_updated
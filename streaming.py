@@ -0,0 +1,115 @@
+"""Потоковый разбор больших ответов API Яндекс.Практикум.
+
+Тело ответа читается кусками, а работы из массива homeworks
+разбираются и проверяются по одной, поэтому в памяти одновременно
+находится только текущая работа и непрочитанный остаток куска.
+"""
+import codecs
+import json
+
+from models import Homework
+
+WHITESPACE = ' \t\n\r'
+
+
+class HomeworkStream:
+    """Итератор моделей Homework по кускам байтов ответа API.
+
+    Остальные поля ответа верхнего уровня, например current_date,
+    доступны через get() после того, как итерация завершилась.
+    Нарушения структуры ответа приводят к тем же исключениям, что и
+    check_response().
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+        self.fields = {}
+
+    def get(self, key, default=None):
+        """Значение поля ответа верхнего уровня."""
+        return self.fields.get(key, default)
+
+    def __iter__(self):
+        """Разбирает ответ и выдает работы по одной."""
+        if self._next_char() != '{':
+            raise TypeError('Ответ API не является словарем')
+        self.position += 1
+        found = False
+        while self._next_char() != '}':
+            key = self._value()
+            if self._next_char() != ':':
+                raise ValueError('Ответ API не является корректным JSON')
+            self.position += 1
+            if key == 'homeworks':
+                found = True
+                yield from self._homeworks()
+            else:
+                self.fields[key] = self._value()
+            if self._next_char() == ',':
+                self.position += 1
+        if not found:
+            raise KeyError('Отсутствует ключ "homeworks" в ответе API')
+
+    def _homeworks(self):
+        """Выдает работы из массива homeworks."""
+        if self._next_char() != '[':
+            raise TypeError('Значение ключа "homeworks" не является списком')
+        self.position += 1
+        while self._next_char() != ']':
+            yield Homework.from_dict(self._value())
+            if self._next_char() == ',':
+                self.position += 1
+        self.position += 1
+
+    def _next_char(self):
+        """Пропускает пробелы и возвращает следующий символ."""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in WHITESPACE
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._read():
+                raise ValueError('Ответ API оборвался')
+
+    def _value(self):
+        """Разбирает следующее значение JSON целиком.
+
+        Если значение не поместилось в буфер или стоит в самом его
+        конце (число могло продолжиться в следующем куске), дочитывает
+        ответ и пробует снова.
+        """
+        self._next_char()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            if end < len(self.buffer) or not self._read():
+                break
+        self.position = end
+        return value
+
+    def _read(self):
+        """Дочитывает следующий кусок; False, если ответ закончился."""
+        if self.exhausted:
+            return False
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.exhausted = True
+        self.buffer += self.decoder.decode(b'', final=True)
+        return False
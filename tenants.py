@@ -0,0 +1,112 @@
+"""Реестр учеников, которых обслуживает один процесс бота."""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from incidents import ErrorSuppressor
+from state import HomeworkIndex
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+
+class Tenant:
+    """Ученик: токен Практикума, чаты подписчиков и состояние опроса.
+
+    chat_id — основной чат; chat_ids — все подписчики, которые получают
+    те же уведомления от одного опроса API.
+    """
+
+    __slots__ = (
+        'token', 'chat_id', 'chat_ids', 'headers', 'from_date',
+        'last_message', 'interval', 'index', 'errors'
+    )
+
+    def __init__(self, token, chat_id, from_date=None, last_message=''):
+        self.token = token
+        self.chat_id = chat_id
+        self.chat_ids = [chat_id]
+        self.headers = {'Authorization': f'OAuth {token}'}
+        self.from_date = (
+            int(time.time()) if from_date is None else int(from_date)
+        )
+        self.last_message = last_message
+        self.interval = None
+        self.index = HomeworkIndex()
+        self.errors = ErrorSuppressor()
+
+    @property
+    def key(self):
+        """Идентификатор ученика, не раскрывающий токен."""
+        return hashlib.sha256(self.token.encode()).hexdigest()[:16]
+
+    def subscribe(self, chat_id):
+        """Добавляет чат в подписчики, если его там еще нет."""
+        if str(chat_id) not in map(str, self.chat_ids):
+            self.chat_ids.append(chat_id)
+
+    def __repr__(self):
+        """Представление для логов без токена."""
+        return (
+            f'Tenant(key={self.key!r}, chat_id={self.chat_id!r}, '
+            f'subscribers={len(self.chat_ids)})'
+        )
+
+
+def load_tenants(path):
+    """Загружает учеников из JSON-файла или базы SQLite.
+
+    Записи с одинаковым токеном объединяются в одного ученика, которого
+    API опрашивает один раз, а уведомления получают все его чаты.
+    """
+    if os.path.splitext(path)[1].lower() in SQLITE_EXTENSIONS:
+        rows = _read_sqlite(path)
+    else:
+        rows = _read_json(path)
+    tenants = {}
+    for row in rows:
+        tenant = _make_tenant(row)
+        known = tenants.setdefault(tenant.token, tenant)
+        if known is not tenant:
+            for chat_id in tenant.chat_ids:
+                known.subscribe(chat_id)
+    return list(tenants.values())
+
+
+def _read_json(path):
+    """Читает записи реестра из JSON-файла со списком объектов.
+
+    Кроме chat_id запись может перечислить чаты в списке subscribers.
+    """
+    with open(path, encoding='utf-8') as file:
+        rows = json.load(file)
+    if not isinstance(rows, list):
+        raise TypeError('Реестр учеников должен быть списком')
+    return rows
+
+
+def _read_sqlite(path):
+    """Читает записи реестра из таблицы tenants."""
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    try:
+        return [
+            dict(row) for row in connection.execute(
+                'SELECT token, chat_id, from_date FROM tenants'
+            )
+        ]
+    finally:
+        connection.close()
+
+
+def _make_tenant(row):
+    """Создает ученика из записи реестра."""
+    if not row.get('token'):
+        raise ValueError('В записи реестра отсутствует токен')
+    if not row.get('chat_id'):
+        raise ValueError('В записи реестра отсутствует chat_id')
+    tenant = Tenant(row['token'], row['chat_id'], row.get('from_date'))
+    for chat_id in row.get('subscribers') or ():
+        tenant.subscribe(chat_id)
+    return tenant
@@ -0,0 +1,28 @@
+import json
+
+import requests
+
+
+def chunked(data, size):
+    body = json.dumps(data, ensure_ascii=False, indent=1).encode()
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class StreamResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def iter_content(self, chunk_size=1):
+        return iter(chunked(self.data, chunk_size))
+
+    def close(self):
+        pass
+
+
+def mock_stream_api(monkeypatch, respond):
+    def get(*args, params=None, **kwargs):
+        return StreamResponse(respond(params))
+
+    monkeypatch.setattr(requests, 'get', get)
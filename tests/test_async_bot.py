@@ -0,0 +1,106 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import aiohttp
+
+
+class FakeResponse:
+    def __init__(self, status, data):
+        self.status = status
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def read(self):
+        return json.dumps(self.data).encode()
+
+
+class FakeSession:
+    def __init__(self, status=HTTPStatus.OK, data=None, error=None):
+        self.status = status
+        self.data = data
+        self.error = error
+        self.calls = []
+
+    def get(self, url, headers=None, params=None):
+        self.calls.append(params['from_date'])
+        if self.error:
+            raise self.error
+        return FakeResponse(self.status, self.data)
+
+
+class FakeAsyncBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id=None, text=None):
+        await asyncio.sleep(0)
+        self.sent.append((chat_id, text))
+
+
+def poll(session, bot, tenants):
+    import async_bot
+    asyncio.run(async_bot.poll_all(
+        session, bot, tenants, asyncio.Semaphore(2)
+    ))
+
+
+class TestAsyncBot:
+    def test_poll_all_sends_status(
+            self, random_timestamp, data_with_new_hw_status
+    ):
+        from tenants import Tenant
+        session = FakeSession(data=data_with_new_hw_status)
+        bot = FakeAsyncBot()
+        tenants = [Tenant(str(i), i, 0) for i in range(5)]
+
+        poll(session, bot, tenants)
+        poll(session, bot, tenants)
+
+        assert sorted(chat for chat, _ in bot.sent) == list(range(5)), (
+            'Каждому ученику сообщение должно уйти один раз.'
+        )
+        assert all(t.from_date == random_timestamp for t in tenants)
+        assert session.calls == [0] * 5 + [random_timestamp] * 5
+
+    def test_poll_all_reports_api_error(self):
+        from tenants import Tenant
+        session = FakeSession(status=HTTPStatus.INTERNAL_SERVER_ERROR)
+        bot = FakeAsyncBot()
+
+        poll(session, bot, [Tenant('a', 1, 0)])
+
+        assert bot.sent and bot.sent[0][1].startswith('Сбой в работе'), (
+            'При ошибке API в чат должно уйти сообщение о сбое.'
+        )
+
+    def test_poll_all_handles_connection_error(self):
+        from tenants import Tenant
+        session = FakeSession(error=aiohttp.ClientConnectionError('down'))
+        bot = FakeAsyncBot()
+        tenant = Tenant('a', 1, 0)
+
+        poll(session, bot, [tenant])
+
+        assert tenant.from_date == 0
+        assert 'Ошибка при запросе к API' in bot.sent[0][1]
+
+    def test_status_goes_to_every_subscriber(
+            self, random_timestamp, data_with_new_hw_status
+    ):
+        from tenants import Tenant
+        session = FakeSession(data=data_with_new_hw_status)
+        bot = FakeAsyncBot()
+        tenant = Tenant('a', 1, 0)
+        tenant.subscribe(2)
+        tenant.subscribe(3)
+
+        poll(session, bot, [tenant])
+
+        assert len(session.calls) == 1
+        assert sorted(chat for chat, _ in bot.sent) == [1, 2, 3]
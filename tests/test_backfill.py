@@ -0,0 +1,101 @@
+import time
+
+import requests
+
+from tests.fixtures.streaming import mock_stream_api
+
+DAY = 24 * 3600
+START = 1_700_000_000
+
+
+def iso(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+HISTORY = [
+    {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+     'date_updated': iso(START + DAY // 2)},
+    {'id': 2, 'homework_name': 'hw2', 'status': 'rejected',
+     'date_updated': iso(START + DAY + 10)},
+    {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing',
+     'date_updated': iso(START + 2 * DAY + 10)},
+]
+
+
+def mock_api(monkeypatch, calls):
+    def respond(params):
+        calls.append(params['from_date'])
+        since = iso(params['from_date'])
+        return {
+            'homeworks': [
+                item for item in reversed(HISTORY)
+                if item['date_updated'] >= since
+            ],
+            'current_date': START + 3 * DAY
+        }
+
+    mock_stream_api(monkeypatch, respond)
+
+
+class TestBackfill:
+    def test_make_windows(self):
+        from backfill import make_windows
+        assert make_windows(0, 25, 10) == [(0, 10), (10, 20), (20, 25)]
+        assert make_windows(5, 5, 10) == []
+
+    def test_merge_keeps_latest_in_order(self):
+        from backfill import merge
+        from models import Homework
+        old = Homework('hw1', 'reviewing', 1, '2024-01-01T00:00:00Z')
+        new = Homework('hw1', 'approved', 1, '2024-01-03T00:00:00Z')
+        other = Homework('hw2', 'approved', 2, '2024-01-02T00:00:00Z')
+
+        merged = merge([[new], [old, other]])
+
+        assert [(hw.id, hw.status) for hw in merged] == [
+            (2, 'approved'), (1, 'approved')
+        ]
+
+    def test_split_windows(self):
+        from backfill import split_windows
+        from models import Homework
+        homeworks = [
+            Homework.from_dict(item) for item in HISTORY
+        ] + [Homework('hw4', 'approved', 4, iso(START + 5 * DAY))]
+
+        batches = split_windows(homeworks, [
+            (START, START + DAY), (START + DAY, START + 2 * DAY),
+            (START + 2 * DAY, START + 4 * DAY)
+        ])
+
+        assert [[hw.id for hw in batch] for batch in batches] == [
+            [1], [2], [3]
+        ]
+
+    def test_backfill_saves_history(self, monkeypatch):
+        import backfill
+        from models import Homework
+        from state import StateStore
+        from tenants import Tenant
+        calls = []
+        mock_api(monkeypatch, calls)
+        store = StateStore()
+        tenant = Tenant('token', 1, 0)
+
+        report = backfill.backfill(
+            [tenant], store, START, START + 3 * DAY, DAY, concurrency=3,
+            session=requests
+        )
+
+        assert calls == [START], 'История читается одним запросом.'
+        assert report['saved'] == 3
+        assert report['read'] == 3
+        assert tenant.from_date == START + 3 * DAY
+        assert len(tenant.index) == 3
+
+        restored = Tenant('token', 1, 0)
+        assert store.restore([restored]) == 1
+        assert restored.from_date == START + 3 * DAY
+        assert not restored.index.changes(
+            [Homework.from_dict(item) for item in HISTORY]
+        ), 'После загрузки истории бот не должен повторять уведомления.'
@@ -0,0 +1,142 @@
+import requests
+
+import tests.check_utils as check_utils
+from clock import VirtualClock
+
+
+def failing():
+    from exceptions import ApiRequestException
+    raise ApiRequestException('down')
+
+
+def make_breaker(**kwargs):
+    from circuit import CircuitBreaker
+    from exceptions import ApiRequestException
+    clock = VirtualClock()
+    changes = []
+    breaker = CircuitBreaker(
+        failure_threshold=3, reset_timeout=10, ramp_up=10,
+        failures=(ApiRequestException,), clock=clock.monotonic,
+        on_change=lambda old, new: changes.append(new), **kwargs
+    )
+    return breaker, clock, changes
+
+
+def call_ignoring(breaker, function):
+    from exceptions import APIResponseError
+    try:
+        return breaker.call(function)
+    except APIResponseError as error:
+        return error
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_rejects(self):
+        from circuit import OPEN
+        from exceptions import CircuitOpenError
+        breaker, _, changes = make_breaker()
+        for _ in range(3):
+            call_ignoring(breaker, failing)
+
+        assert breaker.state == OPEN
+        assert changes == [OPEN]
+        assert isinstance(
+            call_ignoring(breaker, lambda: 'ok'), CircuitOpenError
+        ), 'Разомкнутый предохранитель не должен пропускать запросы.'
+
+    def test_client_errors_do_not_open(self):
+        from circuit import CLOSED
+        from exceptions import APIResponseError
+        breaker, _, _ = make_breaker()
+
+        def unauthorized():
+            raise APIResponseError('401')
+
+        for _ in range(5):
+            call_ignoring(breaker, unauthorized)
+
+        assert breaker.state == CLOSED
+
+    def test_single_probe_then_close(self):
+        from circuit import CLOSED, HALF_OPEN, OPEN
+        from exceptions import CircuitOpenError
+        breaker, clock, changes = make_breaker()
+        for _ in range(3):
+            call_ignoring(breaker, failing)
+        clock.now = 10
+
+        assert breaker.allow() is True
+        assert breaker.state == HALF_OPEN
+        assert isinstance(
+            call_ignoring(breaker, lambda: 'ok'), CircuitOpenError
+        ), 'Во время пробного запроса остальные должны отклоняться.'
+        breaker.record_success()
+
+        assert changes == [OPEN, HALF_OPEN, CLOSED]
+
+    def test_failed_probe_reopens(self):
+        from circuit import OPEN
+        breaker, clock, _ = make_breaker()
+        for _ in range(3):
+            call_ignoring(breaker, failing)
+        clock.now = 10
+
+        call_ignoring(breaker, failing)
+
+        assert breaker.state == OPEN
+        assert breaker.opened_at == 10
+
+    def test_traffic_ramps_up_after_recovery(self):
+        breaker, clock, _ = make_breaker()
+        for _ in range(3):
+            call_ignoring(breaker, failing)
+        clock.now = 10
+        assert breaker.call(lambda: 'ok') == 'ok'
+
+        clock.now = 12.5
+        admitted = sum(
+            call_ignoring(breaker, lambda: 'ok') == 'ok' for _ in range(100)
+        )
+        assert admitted == 25, (
+            'Через четверть ramp_up должна проходить четверть запросов.'
+        )
+        clock.now = 20
+        assert all(
+            call_ignoring(breaker, lambda: 'ok') == 'ok' for _ in range(10)
+        )
+
+
+class TestApiBreaker:
+    def test_open_breaker_skips_requests(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        from circuit import CircuitBreaker
+        from exceptions import ApiRequestException, ApiServerError
+        calls = []
+
+        def broken_get(*args, **kwargs):
+            calls.append(kwargs)
+            return check_utils.MockResponseGET(
+                random_timestamp=random_timestamp, http_status=503
+            )
+
+        monkeypatch.setattr(requests, 'get', broken_get)
+        monkeypatch.setattr(homework_module, 'backoff_delay', lambda _: 0)
+        monkeypatch.setattr(homework_module, 'API_BREAKER', CircuitBreaker(
+            failure_threshold=2,
+            failures=(ApiRequestException, ApiServerError)
+        ))
+        tenant = homework_module.Tenant('token', 1, 0)
+        sent = []
+
+        for _ in range(3):
+            homework_module.poll_tenant(tenant, sent.append)
+
+        assert len(calls) == 2, (
+            'После размыкания предохранителя запросы к API не должны '
+            'отправляться.'
+        )
+        assert len(sent) == 1, (
+            'О разомкнутом предохранителе ученик узнает один раз.'
+        )
+        assert 'API недоступен' in sent[0]
@@ -0,0 +1,129 @@
+import time
+
+
+def status(name, verdict):
+    return f'Изменился статус проверки работы "{name}". {verdict}'
+
+
+class TestCoalescer:
+    def test_latest_status_per_homework(self, homework_module):
+        from coalesce import latest_only
+        texts = [
+            status('a', 'Взята'),
+            status('b', 'Взята'),
+            'Домашних работ нет',
+            status('a', 'Проверена'),
+        ]
+
+        assert latest_only(texts, homework_module.message_key) == [
+            status('b', 'Взята'),
+            'Домашних работ нет',
+            status('a', 'Проверена'),
+        ]
+
+    def test_digest_respects_message_limit(self):
+        from coalesce import make_digests
+        texts = [str(number) * 40 for number in range(10)]
+
+        digests = make_digests(texts, limit=200)
+
+        assert all(len(digest) <= 200 for digest in digests)
+        assert sum(digest.count('•') for digest in digests) == 10
+        assert make_digests(['one']) == ['one']
+
+    def test_unknown_mode(self):
+        from coalesce import get_coalescer
+        assert get_coalescer('') is None
+        try:
+            get_coalescer('all')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('Неизвестный режим должен вызывать ошибку.')
+
+
+class TestCoalescedDelivery:
+    def test_outbox_sends_one_digest_per_chat(self, homework_module):
+        from coalesce import get_coalescer
+        from outbox import Outbox
+        outbox = Outbox(':memory:')
+        for verdict in ('Взята', 'Отклонена', 'Взята'):
+            outbox.add_many(['1', '2'], status('a', verdict))
+        outbox.add('1', status('b', 'Проверена'))
+        sent = []
+
+        delivered = outbox.deliver(
+            lambda chat, text: sent.append((chat, text)),
+            coalesce=get_coalescer('digest', homework_module.message_key)
+        )
+
+        assert delivered == (7, 0)
+        assert [chat for chat, _ in sent] == ['1', '2']
+        assert sent[0][1].count('•') == 2
+        assert sent[1][1] == status('a', 'Взята')
+        assert outbox.pending() == 0
+
+    def test_engine_holds_messages_for_window(
+            self, monkeypatch, homework_module
+    ):
+        import engine
+        import tenants
+        from coalesce import get_coalescer
+        from tests.test_engine import RecordingBot
+        monkeypatch.setattr(engine, 'NOTIFY_COALESCE_WINDOW', 60)
+        monkeypatch.setattr(engine, 'COALESCE', get_coalescer(
+            'latest', homework_module.message_key
+        ))
+        bot = RecordingBot()
+        polling_engine = engine.PollingEngine(
+            bot, [tenants.Tenant('a', 1, 0)], workers=1
+        )
+        for verdict in ('Взята', 'Отклонена', 'Взята'):
+            polling_engine.notify([1], status('a', verdict))
+
+        assert polling_engine.redeliver() == 0, (
+            'До конца окна сообщения не отправляются.'
+        )
+        polling_engine.outbox.clock = lambda: time.time() + 60
+        assert polling_engine.redeliver() == 3
+        polling_engine.notifier.join()
+
+        assert bot.sent == [('1', status('a', 'Взята'))]
+        assert polling_engine.outbox.pending() == 0
+
+    def test_failed_part_keeps_whole_digest(
+            self, monkeypatch, homework_module
+    ):
+        import requests
+
+        import engine
+        import tenants
+        from coalesce import get_coalescer
+        from tests.test_engine import RecordingBot
+
+        class FlakyBot(RecordingBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if not self.failed:
+                    self.failed = True
+                    raise requests.ConnectionError('down')
+                super().send_message(chat_id, text)
+
+        monkeypatch.setattr(engine, 'COALESCE', get_coalescer(
+            'digest', homework_module.message_key, limit=120
+        ))
+        monkeypatch.setattr(engine, 'TELEGRAM_CHAT_RATE', 1000)
+        bot = FlakyBot()
+        bot.failed = False
+        polling_engine = engine.PollingEngine(
+            bot, [tenants.Tenant('a', 1, 0)], workers=1
+        )
+        for name in 'abc':
+            polling_engine.outbox.add('1', status(name * 20, 'Взята'))
+
+        assert polling_engine.redeliver() == 3
+        polling_engine.notifier.join()
+
+        assert bot.sent, 'Остальные части сводки должны уйти.'
+        assert polling_engine.outbox.pending() == 3, (
+            'Записи сводки подтверждаются, только когда ушли все части.'
+        )
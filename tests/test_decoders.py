@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+
+class BytesResponse:
+    def __init__(self, data):
+        self.content = json.dumps(data).encode()
+
+    def json(self):
+        raise AssertionError('Ответ с телом разбирается из байтов')
+
+
+class TestDecoders:
+    def test_get_decoder_by_name(self):
+        import decoders
+        assert decoders.get_decoder('json') is decoders.stdlib_loads
+        assert decoders.get_decoder('auto') is decoders.DECODERS.get(
+            'orjson', decoders.stdlib_loads
+        )
+        with pytest.raises(ValueError):
+            decoders.get_decoder('unknown')
+
+    def test_decoders_agree(self):
+        import decoders
+        payload = json.dumps(
+            {'homeworks': [{'homework_name': 'Работа', 'id': 1}]}
+        ).encode()
+
+        results = [loads(payload) for loads in decoders.DECODERS.values()]
+
+        assert all(result == results[0] for result in results)
+
+    def test_response_is_decoded_from_bytes(self, monkeypatch):
+        import homework
+        calls = []
+
+        def loads(content):
+            calls.append(content)
+            return json.loads(content)
+
+        monkeypatch.setattr(homework, 'JSON_LOADS', loads)
+
+        data = homework.decode_response(BytesResponse({'homeworks': []}))
+
+        assert data == {'homeworks': []}
+        assert calls == [b'{"homeworks": []}']
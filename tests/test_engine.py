@@ -0,0 +1,305 @@
+import json
+from http import HTTPStatus
+import sqlite3
+import time
+
+import requests
+
+import tests.check_utils as check_utils
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+def mock_api(monkeypatch, data_by_token, random_timestamp):
+    def mocked_get(*args, headers=None, **kwargs):
+        token = headers['Authorization'].split(' ', 1)[1]
+        return check_utils.MockResponseGET(
+            random_timestamp=random_timestamp, data=data_by_token[token]
+        )
+
+    monkeypatch.setattr(requests, 'get', mocked_get)
+    monkeypatch.setattr(
+        requests.Session, 'get',
+        lambda self, *args, **kwargs: mocked_get(*args, **kwargs)
+    )
+
+
+class TestTenants:
+    def test_load_tenants_from_json(self, tmp_path):
+        import tenants
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1, 'from_date': 100},
+            {'token': 'b', 'chat_id': 2},
+        ]))
+
+        loaded = tenants.load_tenants(str(path))
+
+        assert [t.chat_id for t in loaded] == [1, 2]
+        assert loaded[0].from_date == 100
+        assert loaded[0].headers == {'Authorization': 'OAuth a'}
+        assert loaded[0].key != loaded[1].key
+
+    def test_load_tenants_from_sqlite(self, tmp_path):
+        import tenants
+        path = tmp_path / 'tenants.db'
+        connection = sqlite3.connect(path)
+        connection.execute(
+            'CREATE TABLE tenants (token TEXT, chat_id TEXT, from_date INT)'
+        )
+        connection.execute("INSERT INTO tenants VALUES ('a', '1', 5)")
+        connection.commit()
+        connection.close()
+
+        loaded = tenants.load_tenants(str(path))
+
+        assert len(loaded) == 1
+        assert loaded[0].from_date == 5
+
+    def test_rows_with_same_token_become_subscribers(self, tmp_path):
+        import tenants
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1, 'subscribers': [2, 3]},
+            {'token': 'a', 'chat_id': 4},
+            {'token': 'a', 'chat_id': 2},
+            {'token': 'b', 'chat_id': 5},
+        ]))
+
+        loaded = tenants.load_tenants(str(path))
+
+        assert [t.chat_ids for t in loaded] == [[1, 2, 3, 4], [5]]
+
+    def test_load_tenants_without_chat_id(self, tmp_path):
+        import tenants
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'token': 'a'}]))
+        try:
+            tenants.load_tenants(str(path))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(
+                'Запись реестра без chat_id должна вызывать ValueError.'
+            )
+
+
+class TestPollingEngine:
+    def test_run_once_keeps_state_per_tenant(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import engine
+        import tenants
+        mock_api(monkeypatch, {
+            'a': data_with_new_hw_status,
+            'b': {'homeworks': [], 'current_date': random_timestamp},
+        }, random_timestamp)
+        bot = RecordingBot()
+        registry = [tenants.Tenant('a', 1, 0), tenants.Tenant('b', 2, 0)]
+
+        polling_engine = engine.PollingEngine(bot, registry, workers=2)
+        polling_engine.run_once()
+        polling_engine.run_once()
+        polling_engine.notifier.join()
+
+        assert sorted(chat for chat, _ in bot.sent) == ['1', '2'], (
+            'Каждому ученику сообщение должно уйти один раз и в свой чат.'
+        )
+        assert all(t.from_date == random_timestamp for t in registry)
+        assert registry[1].last_message == 'Домашних работ нет'
+        assert polling_engine.outbox.pending() == 0, (
+            'Доставленные сообщения не должны оставаться в журнале.'
+        )
+
+    def test_failed_send_is_redelivered(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import engine
+        import tenants
+        from exceptions import SendMessageError
+        mock_api(monkeypatch, {'a': data_with_new_hw_status}, random_timestamp)
+        bot = RecordingBot()
+        failures = [SendMessageError('down')]
+
+        def flaky_send(chat_id=None, text=None):
+            if failures:
+                raise failures.pop()
+            bot.sent.append((chat_id, text))
+
+        bot.send_message = flaky_send
+        polling_engine = engine.PollingEngine(
+            bot, [tenants.Tenant('a', 1, 0)], workers=1
+        )
+        polling_engine.run_once()
+        polling_engine.notifier.join()
+        assert polling_engine.outbox.pending() == 1, (
+            'Неотправленное сообщение должно остаться в журнале.'
+        )
+
+        polling_engine.outbox.clock = lambda: time.time() + 3600
+        assert polling_engine.redeliver() == 1
+        polling_engine.notifier.join()
+
+        assert len(bot.sent) == 1
+        assert polling_engine.outbox.pending() == 0
+
+    def test_one_poll_fans_out_to_subscribers(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import engine
+        import tenants
+        calls = []
+
+        def counting_get(*args, **kwargs):
+            calls.append(kwargs)
+            return check_utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                data=data_with_new_hw_status
+            )
+
+        monkeypatch.setattr(
+            requests.Session, 'get',
+            lambda self, *args, **kwargs: counting_get(*args, **kwargs)
+        )
+        bot = RecordingBot()
+        tenant = tenants.Tenant('a', 1, 0)
+        for chat_id in (2, 3):
+            tenant.subscribe(chat_id)
+
+        polling_engine = engine.PollingEngine(bot, [tenant], workers=1)
+        polling_engine.run_once()
+        polling_engine.notifier.join()
+
+        assert len(calls) == 1, 'API должен опрашиваться один раз на токен.'
+        assert sorted(chat for chat, _ in bot.sent) == ['1', '2', '3']
+        assert len({text for _, text in bot.sent}) == 1
+        assert polling_engine.outbox.pending() == 0
+
+
+class TestSession:
+    def test_create_session_pool(self, homework_module):
+        session = homework_module.create_session(pool_size=7)
+        adapter = session.get_adapter(homework_module.ENDPOINT)
+        assert adapter._pool_maxsize == 7
+        assert session.headers['Connection'] == 'keep-alive'
+
+    def test_request_api_uses_session(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        def fail_get(*args, **kwargs):
+            raise AssertionError('Запрос должен идти через сессию.')
+
+        monkeypatch.setattr(requests, 'get', fail_get)
+        session = homework_module.create_session(pool_size=1)
+        monkeypatch.setattr(
+            session, 'get',
+            lambda **kwargs: check_utils.MockResponseGET(
+                random_timestamp=random_timestamp
+            )
+        )
+
+        result = homework_module.request_api(
+            0, homework_module.HEADERS, session
+        )
+
+        assert result['current_date'] == random_timestamp
+
+
+class TestRetry:
+    def mock_get_sequence(self, monkeypatch, statuses, random_timestamp):
+        calls = []
+
+        def mocked_get(*args, **kwargs):
+            calls.append(kwargs)
+            status = statuses[min(len(calls), len(statuses)) - 1]
+            if status is None:
+                raise requests.ConnectionError('reset')
+            return check_utils.MockResponseGET(
+                random_timestamp=random_timestamp, http_status=status
+            )
+
+        monkeypatch.setattr(requests, 'get', mocked_get)
+        monkeypatch.setattr(time, 'sleep', lambda secs: None)
+        return calls
+
+    def test_retries_server_and_network_errors(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        calls = self.mock_get_sequence(
+            monkeypatch, [None, HTTPStatus.BAD_GATEWAY, HTTPStatus.OK],
+            random_timestamp
+        )
+
+        result = homework_module.get_api_answer(0)
+
+        assert result['current_date'] == random_timestamp
+        assert len(calls) == 3
+        assert calls[0]['timeout'] == (
+            homework_module.API_CONNECT_TIMEOUT,
+            homework_module.API_READ_TIMEOUT
+        ), 'В запрос к API должен передаваться таймаут.'
+
+    def test_does_not_retry_client_errors(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        calls = self.mock_get_sequence(
+            monkeypatch, [HTTPStatus.UNAUTHORIZED], random_timestamp
+        )
+        try:
+            homework_module.get_api_answer(0)
+        except homework_module.APIResponseError:
+            pass
+        assert len(calls) == 1, 'Ответ 4xx не должен повторяться.'
+
+    def test_gives_up_after_attempts(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        calls = self.mock_get_sequence(
+            monkeypatch, [HTTPStatus.SERVICE_UNAVAILABLE], random_timestamp
+        )
+        try:
+            homework_module.get_api_answer(0)
+        except homework_module.ApiServerError:
+            pass
+        else:
+            raise AssertionError('После всех попыток ошибка должна дойти.')
+        assert len(calls) == homework_module.API_RETRY_ATTEMPTS
+
+    def test_slow_attempts_stay_within_budget(
+            self, monkeypatch, homework_module
+    ):
+        from clock import VirtualClock
+        clock = VirtualClock()
+        calls = []
+
+        def slow_get(*args, timeout=None, **kwargs):
+            calls.append(timeout)
+            clock.sleep(sum(timeout))
+            raise requests.ConnectionError('timed out')
+
+        monkeypatch.setattr(requests, 'get', slow_get)
+        monkeypatch.setattr(homework_module, 'CLOCK', clock)
+        monkeypatch.setattr(homework_module, 'API_RETRY_BUDGET', 60)
+        monkeypatch.setattr(homework_module, 'API_RETRY_ATTEMPTS', 3)
+        monkeypatch.setattr(homework_module, 'API_CONNECT_TIMEOUT', 5)
+        monkeypatch.setattr(homework_module, 'API_READ_TIMEOUT', 30)
+
+        try:
+            homework_module.get_api_answer(0)
+        except homework_module.ApiRequestException:
+            pass
+
+        assert len(calls) == 2
+        assert calls[1][1] < 30, 'Таймаут повтора урезается до бюджета.'
+        assert clock.now <= 60, 'Попытки не должны выходить за бюджет.'
+
+    def test_backoff_delay_is_capped(self, monkeypatch, homework_module):
+        monkeypatch.setattr(homework_module, 'API_RETRY_BACKOFF_MAX', 2)
+        for attempt in range(1, 20):
+            assert 0 <= homework_module.backoff_delay(attempt) <= 2
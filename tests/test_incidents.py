@@ -0,0 +1,146 @@
+import requests
+
+import tests.check_utils as check_utils
+from clock import VirtualClock
+
+
+class TestFingerprint:
+    def test_volatile_details_are_ignored(self):
+        from exceptions import ApiServerError
+        from incidents import fingerprint
+        first = ApiServerError('API вернул код ответа: 502')
+        second = ApiServerError('API вернул код ответа:  503')
+        assert fingerprint(first) == fingerprint(second)
+
+    def test_class_is_part_of_fingerprint(self):
+        from exceptions import ApiRequestException, ApiServerError
+        from incidents import fingerprint
+        assert fingerprint(ApiServerError('x')) != fingerprint(
+            ApiRequestException('x')
+        )
+
+
+class TestErrorSuppressor:
+    def test_repeats_are_suppressed_until_resolved(self):
+        from incidents import ErrorSuppressor
+        suppressor = ErrorSuppressor()
+        messages = [
+            suppressor.report(ValueError(f'timeout after {seconds} s'))
+            for seconds in range(5)
+        ]
+
+        assert messages[0] == 'Сбой в работе программы: timeout after 0 s'
+        assert messages[1:] == [None] * 4
+        assert suppressor.resolve() == 'Сбой устранен, повторов скрыто: 4'
+        assert suppressor.resolve() is None
+        assert suppressor.report(ValueError('timeout after 9 s')) == (
+            'Сбой в работе программы: timeout after 9 s'
+        ), 'О новом сбое после итога нужно сообщать сразу.'
+
+    def test_summary_resets_hidden_counter(self):
+        from incidents import ErrorSuppressor
+        clock = VirtualClock()
+        suppressor = ErrorSuppressor(window=60, clock=clock.monotonic)
+        for _ in range(3):
+            suppressor.report(ValueError('down'))
+        assert suppressor.resolve() == 'Сбой устранен, повторов скрыто: 2'
+        suppressor.report(ValueError('down'))
+        suppressor.report(ValueError('down'))
+        clock.now = 60
+
+        assert suppressor.report(ValueError('down')) == (
+            'Сбой в работе программы: down (повторов скрыто: 1)'
+        ), 'Повторы из итога не должны считаться снова.'
+
+    def test_error_without_repeats_stays_quiet_after_success(self):
+        from incidents import ErrorSuppressor
+        suppressor = ErrorSuppressor()
+        assert suppressor.report(ValueError('down')) is not None
+        assert suppressor.resolve() is None
+        assert suppressor.report(ValueError('down')) is None, (
+            'Без итога ученик не знает об устранении, повтор скрывается.'
+        )
+
+    def test_alternating_errors_send_once_each(self):
+        from incidents import ErrorSuppressor
+        suppressor = ErrorSuppressor()
+        sent = [
+            message
+            for _ in range(10)
+            for error in (ValueError('a'), KeyError('b'))
+            if (message := suppressor.report(error)) is not None
+        ]
+        assert len(sent) == 2
+
+    def test_zero_window_disables_suppression(self):
+        from incidents import ErrorSuppressor
+        suppressor = ErrorSuppressor(window=0)
+        assert all(
+            suppressor.report(ValueError('down')) for _ in range(3)
+        )
+
+    def test_window_repeats_with_counter(self):
+        from incidents import ErrorSuppressor
+        clock = VirtualClock()
+        suppressor = ErrorSuppressor(window=60, clock=clock.monotonic)
+        for _ in range(3):
+            suppressor.report(ValueError('down'))
+        clock.now = 60
+
+        assert suppressor.report(ValueError('down')) == (
+            'Сбой в работе программы: down (повторов скрыто: 2)'
+        )
+        assert suppressor.resolve() is None, (
+            'Повторы, о которых уже сообщено, не попадают в итог.'
+        )
+
+
+class TestPollErrors:
+    def test_error_alternating_with_status_is_sent_once(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        responses = [500, 200, 500, 200, 500, 200]
+
+        def flapping_get(*args, **kwargs):
+            return check_utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                http_status=responses.pop(0)
+            )
+
+        monkeypatch.setattr(requests, 'get', flapping_get)
+        monkeypatch.setattr(homework_module, 'API_RETRY_ATTEMPTS', 1)
+        tenant = homework_module.Tenant('token', 1, 0)
+        sent = []
+
+        for _ in range(6):
+            homework_module.poll_tenant(tenant, sent.append)
+
+        assert sent == [
+            'Сбой в работе программы: API вернул код ответа: 500',
+            'Домашних работ нет',
+        ], 'Чередование ошибки и статуса не должно повторять сообщения.'
+
+    def test_summary_after_error_clears(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        responses = [503, 502, 503, 200]
+
+        def recovering_get(*args, **kwargs):
+            return check_utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                http_status=responses.pop(0)
+            )
+
+        monkeypatch.setattr(requests, 'get', recovering_get)
+        monkeypatch.setattr(homework_module, 'API_RETRY_ATTEMPTS', 1)
+        tenant = homework_module.Tenant('token', 1, 0)
+        sent = []
+
+        for _ in range(4):
+            homework_module.poll_tenant(tenant, sent.append)
+
+        assert sent == [
+            'Сбой в работе программы: API вернул код ответа: 503',
+            'Домашних работ нет',
+            'Сбой устранен, повторов скрыто: 2',
+        ]
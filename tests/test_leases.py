@@ -0,0 +1,262 @@
+import sqlite3
+
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+from clock import VirtualClock
+
+
+def make_stores(tmp_path, *owners, clock=None):
+    from leases import LeaseStore
+    clock = clock or VirtualClock(1000)
+    path = str(tmp_path / 'leases.db')
+    return clock, [
+        LeaseStore(path, owner=owner, ttl=30, clock=clock.time)
+        for owner in owners
+    ]
+
+
+class TestLeaseStore:
+    def test_single_holder_until_expiry(self, tmp_path):
+        clock, (first, second) = make_stores(tmp_path, 'a', 'b')
+
+        assert first.acquire('leader')
+        assert not second.acquire('leader')
+        assert first.acquire('leader'), 'Владелец должен продлевать аренду.'
+        clock.now += 30
+
+        assert second.acquire('leader'), (
+            'Просроченную аренду должен забирать другой процесс.'
+        )
+        assert not first.acquire('leader')
+        assert first.holder('leader') == 'b'
+
+    def test_release_hands_over_at_once(self, tmp_path):
+        _, (first, second) = make_stores(tmp_path, 'a', 'b')
+        first.acquire('leader')
+
+        first.release('leader')
+
+        assert second.acquire('leader')
+
+    def test_leader_reports_changes(self, tmp_path):
+        from leases import Leader
+        clock, (first, second) = make_stores(tmp_path, 'a', 'b')
+        leader, standby = Leader(first), Leader(second)
+
+        assert leader.elect() and leader.changed
+        assert not standby.elect() and not standby.changed
+        assert leader.elect() and not leader.changed
+        leader.resign()
+
+        assert standby.elect() and standby.changed
+        assert Leader().elect(), 'Без базы аренд процесс всегда ведущий.'
+
+
+class TestPartitions:
+    def test_parts_are_shared_and_failed_over(self, tmp_path):
+        from leases import Partitions
+        clock, (first, second) = make_stores(tmp_path, 'a', 'b')
+        one, two = Partitions(first, 8), Partitions(second, 8)
+
+        one.rebalance()
+        assert len(one.owned) == 8
+        two.rebalance()
+        one.rebalance()
+        acquired, _ = two.rebalance()
+
+        assert len(one.owned) == len(two.owned) == 4
+        assert one.owned.isdisjoint(two.owned)
+        assert acquired == set(two.owned)
+
+        clock.now += 30
+        one.rebalance()
+        assert len(one.owned) == 8, (
+            'Части пропавшего процесса должны переходить к живым.'
+        )
+
+    def test_new_parts_are_announced_before_use(self, tmp_path):
+        from leases import Partitions
+        _, (store,) = make_stores(tmp_path, 'a')
+        partitions = Partitions(store, 4)
+        seen = []
+
+        partitions.rebalance(
+            lambda parts: seen.append((set(parts), set(partitions.owned)))
+        )
+
+        assert seen == [({0, 1, 2, 3}, set())]
+
+
+class TestEngineOwnership:
+    def test_each_tenant_polled_by_one_engine(
+            self, monkeypatch, tmp_path, random_timestamp
+    ):
+        import engine
+        import tenants
+        from leases import LeaseStore
+        calls = []
+
+        def counting_get(self, *args, headers=None, **kwargs):
+            calls.append(headers['Authorization'])
+            return check_utils.MockResponseGET(
+                random_timestamp=random_timestamp
+            )
+
+        monkeypatch.setattr(requests.Session, 'get', counting_get)
+        monkeypatch.setattr(engine, 'LEASE_PARTITIONS', 4)
+        path = str(tmp_path / 'leases.db')
+        engines = [
+            engine.PollingEngine(
+                check_utils.MockTelegramBot(),
+                [tenants.Tenant(token, 1, 0) for token in 'abcdefgh'],
+                workers=1,
+                leases=LeaseStore(path, owner=owner)
+            )
+            for owner in ('first', 'second')
+        ]
+        for polling_engine in engines * 2:
+            polling_engine.rebalance()
+
+        for polling_engine in engines:
+            polling_engine.run_once()
+
+        assert sorted(calls) == [f'OAuth {token}' for token in 'abcdefgh'], (
+            'Каждого ученика должен опрашивать ровно один движок.'
+        )
+
+    def test_engine_stops_polling_when_leases_lapse(self, tmp_path):
+        import engine
+        import tenants
+        from leases import LeaseStore
+        clock = VirtualClock()
+        polling_engine = engine.PollingEngine(
+            check_utils.MockTelegramBot(), [tenants.Tenant('a', 1, 0)],
+            workers=1, clock=clock,
+            leases=LeaseStore(str(tmp_path / 'leases.db'))
+        )
+        polling_engine.rebalance()
+        waits = iter([False, False, True])
+
+        def locked(*args, **kwargs):
+            clock.sleep(engine.LEASE_TTL / 2)
+            raise sqlite3.OperationalError('database is locked')
+
+        polling_engine.partitions.rebalance = locked
+        polling_engine.shutdown.wait = lambda timeout=None: next(waits)
+
+        polling_engine.rebalance_forever()
+
+        assert not polling_engine.owns(polling_engine.tenants[0]), (
+            'Без продления аренд движок не должен опрашивать учеников.'
+        )
+
+
+class TestTakeLead:
+    def test_new_leader_restores_state(self, tmp_path, homework_module):
+        from leases import Leader
+        from state import StateStore
+        _, (first, second) = make_stores(tmp_path, 'a', 'b')
+        path = str(tmp_path / 'state.db')
+        leader_store, standby_store = StateStore(path), StateStore(path)
+        tenant = homework_module.Tenant('token', 1, 0)
+        standby_tenant = homework_module.Tenant('token', 1, 0)
+        leader, standby = Leader(first), Leader(second)
+
+        assert homework_module.take_lead(leader, leader_store, tenant)
+        assert not homework_module.take_lead(
+            standby, standby_store, standby_tenant
+        )
+        tenant.from_date = 500
+        leader_store.save(tenant)
+        leader_store.flush()
+        leader.resign()
+
+        assert homework_module.take_lead(
+            standby, standby_store, standby_tenant
+        )
+        assert standby_tenant.from_date == 500
+
+    def test_leases_need_shared_stores(
+            self, monkeypatch, tmp_path, homework_module
+    ):
+        monkeypatch.setattr(
+            homework_module, 'LEASE_DB', str(tmp_path / 'leases.db')
+        )
+        monkeypatch.setattr(homework_module, 'STATE_DB', ':memory:')
+
+        with pytest.raises(SystemExit):
+            homework_module.open_leases()
+
+        monkeypatch.setattr(
+            homework_module, 'STATE_DB', str(tmp_path / 'state.db')
+        )
+        monkeypatch.setattr(
+            homework_module, 'OUTBOX_DB', str(tmp_path / 'state.db')
+        )
+        assert homework_module.open_leases() is not None
+
+    def test_leader_lapses_after_failed_renewals(self, tmp_path):
+        from leases import Leader
+        clock, (store,) = make_stores(tmp_path, 'a')
+        leader = Leader(store)
+        leader.elect()
+        clock.now += 20
+
+        assert not leader.lapse() and leader.leading
+        clock.now += 10
+        assert leader.lapse() and not leader.leading, (
+            'Процесс не должен считаться ведущим после срока аренды.'
+        )
+
+    def test_main_survives_lease_error(
+            self, monkeypatch, tmp_path, random_timestamp, homework_module
+    ):
+        import inspect
+        import time
+
+        import telebot
+
+        from leases import LeaseStore
+
+        class StopLoop(Exception):
+            pass
+
+        def sleep(delay):
+            delays.append(delay)
+            if len(delays) == 3:
+                raise StopLoop
+
+        def flaky_acquire(self, name, ttl=None):
+            calls.append(name)
+            if len(calls) == 2:
+                raise sqlite3.OperationalError('database is locked')
+            return acquire(self, name, ttl)
+
+        delays = []
+        calls = []
+        acquire = LeaseStore.acquire
+        monkeypatch.setattr(LeaseStore, 'acquire', flaky_acquire)
+        for name in ('LEASE_DB', 'STATE_DB', 'OUTBOX_DB'):
+            monkeypatch.setattr(
+                homework_module, name, str(tmp_path / f'{name}.db')
+            )
+        monkeypatch.setattr(
+            telebot, 'TeleBot',
+            lambda *args, **kwargs: check_utils.MockTelegramBot()
+        )
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=random_timestamp
+            )
+        )
+        monkeypatch.setattr(time, 'sleep', sleep)
+
+        with pytest.raises(StopLoop):
+            # test_bot оборачивает main() проверкой time.sleep()
+            inspect.unwrap(homework_module.main)()
+
+        assert len(calls) == 3, 'Сбой аренды не должен останавливать бота.'
+        assert delays[1] == homework_module.LEASE_TTL / 3
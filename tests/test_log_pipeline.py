@@ -0,0 +1,136 @@
+import gzip
+import logging
+import queue
+
+
+def make_record(level=logging.INFO, message='сообщение'):
+    return logging.LogRecord('bot', level, __file__, 1, message, (), None)
+
+
+class TestDroppingQueueHandler:
+    def test_drops_when_queue_is_full(self):
+        from log_pipeline import DroppingQueueHandler
+        handler = DroppingQueueHandler(
+            queue.Queue(maxsize=2), sample_above=1
+        )
+
+        for _ in range(5):
+            handler.handle(make_record(logging.ERROR))
+
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
+
+    def test_samples_low_levels_above_high_water(self):
+        from log_pipeline import DroppingQueueHandler
+        handler = DroppingQueueHandler(
+            queue.Queue(maxsize=100), sample_above=0.1, sample_rate=5
+        )
+
+        for _ in range(60):
+            handler.handle(make_record(logging.INFO))
+        handler.handle(make_record(logging.ERROR))
+
+        # 10 записей до порога, затем каждая пятая из 50 и ошибка
+        assert handler.queue.qsize() == 10 + 10 + 1
+        assert handler.dropped == 40
+
+    def test_merges_arguments_without_formatting(self):
+        from log_pipeline import DroppingQueueHandler
+        handler = DroppingQueueHandler(queue.Queue(maxsize=10))
+        record = logging.LogRecord(
+            'bot', logging.INFO, __file__, 1, 'работа %s', ('hw',), None
+        )
+
+        handler.handle(record)
+
+        queued = handler.queue.get_nowait()
+        assert queued.msg == 'работа hw'
+        assert queued.args is None
+        assert record.args == ('hw',)
+
+
+class TestQueueLogging:
+    def test_listener_writes_records(self, tmp_path):
+        from log_pipeline import start_queue_logging
+        path = tmp_path / 'bot.log'
+        file_handler = logging.FileHandler(path, encoding='utf-8')
+        file_handler.setLevel(logging.INFO)
+        logger = logging.getLogger('test_queue_logging')
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+
+        handler, listener = start_queue_logging(logger, [file_handler])
+        logger.debug('не пишется')
+        logger.info('пишется')
+        listener.stop()
+        logger.removeHandler(handler)
+        file_handler.close()
+
+        assert path.read_text(encoding='utf-8') == 'пишется\n'
+
+    def test_rotated_files_are_compressed(self, tmp_path):
+        from log_pipeline import CompressingRotatingFileHandler
+        path = tmp_path / 'bot.log'
+        handler = CompressingRotatingFileHandler(
+            path, maxBytes=30, backupCount=2, encoding='utf-8'
+        )
+
+        for number in range(5):
+            handler.emit(make_record(message=f'запись номер {number}'))
+        handler.close()
+
+        backups = sorted(item.name for item in tmp_path.iterdir())
+        assert backups == ['bot.log', 'bot.log.1.gz', 'bot.log.2.gz']
+        with gzip.open(tmp_path / 'bot.log.1.gz', 'rt') as file:
+            assert file.read() == 'запись номер 3\n'
+
+
+class TestPayloadLogging:
+    HOMEWORK = {
+        'homework_name': 'hw.zip',
+        'status': 'approved',
+        'reviewer_comment': 'очень длинный комментарий'
+    }
+
+    def debug_messages(self, caplog):
+        return [
+            record.getMessage() for record in caplog.records
+            if record.name == 'homework' and record.levelno == logging.DEBUG
+        ]
+
+    def test_payload_is_not_logged_by_default(self, caplog):
+        import homework
+        with caplog.at_level(logging.DEBUG):
+            homework.parse_status(self.HOMEWORK)
+
+        messages = self.debug_messages(caplog)
+        assert messages and all(
+            'комментарий' not in message for message in messages
+        )
+        assert any('hw.zip' in message for message in messages)
+
+    def test_payload_is_logged_with_flag(self, caplog, monkeypatch):
+        import homework
+        monkeypatch.setattr(homework, 'LOG_PAYLOADS', True)
+        with caplog.at_level(logging.DEBUG):
+            homeworks = homework.check_response(
+                {'homeworks': [self.HOMEWORK], 'current_date': 1}
+            )
+            homework.parse_status(homeworks[0])
+
+        assert any(
+            'комментарий' in message
+            for message in self.debug_messages(caplog)
+        ), 'Флаг должен работать и для ответов, разобранных в модели.'
+
+    def test_response_payload_is_not_logged_by_default(self, caplog):
+        import homework
+        with caplog.at_level(logging.DEBUG):
+            homework.check_response(
+                {'homeworks': [self.HOMEWORK], 'current_date': 1}
+            )
+
+        assert all(
+            'комментарий' not in message
+            for message in self.debug_messages(caplog)
+        )
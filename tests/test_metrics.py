@@ -0,0 +1,77 @@
+import urllib.request
+
+import requests
+
+import tests.check_utils as check_utils
+
+
+class TestMetrics:
+    def test_histogram_renders_cumulative_buckets(self):
+        from metrics import Registry
+        registry = Registry()
+        histogram = registry.histogram('latency', 'Задержка', buckets=(1, 5))
+
+        for value in (0.5, 2, 2, 10):
+            histogram.observe(value)
+
+        text = registry.render()
+        assert 'latency_bucket{le="1"} 1' in text
+        assert 'latency_bucket{le="5"} 3' in text
+        assert 'latency_bucket{le="+Inf"} 4' in text
+        assert 'latency_sum 14.5' in text
+        assert 'latency_count 4' in text
+
+    def test_counter_and_gauge_with_labels(self):
+        from metrics import Registry
+        registry = Registry()
+        errors = registry.counter('errors_total', 'Ошибки', ('type',))
+        registry.gauge('depth', 'Очередь', function=lambda: 7)
+
+        errors.inc('A')
+        errors.inc('A')
+        errors.inc('B')
+
+        text = registry.render()
+        assert '# TYPE errors_total counter' in text
+        assert 'errors_total{type="A"} 2' in text
+        assert 'errors_total{type="B"} 1' in text
+        assert 'depth 7' in text
+
+    def test_server_exposes_metrics(self):
+        from metrics import Registry, start_metrics_server
+        registry = Registry()
+        registry.counter('polls_total', 'Опросы').inc()
+        server = start_metrics_server(0, host='127.0.0.1', registry=registry)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(
+                f'http://127.0.0.1:{port}/metrics', timeout=1
+            ) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert 'polls_total 1' in body
+
+    def test_api_errors_and_latency_are_recorded(
+        self, monkeypatch, random_timestamp
+    ):
+        import homework
+        monkeypatch.setattr(homework, 'API_RETRY_ATTEMPTS', 1)
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=random_timestamp, http_status=404
+            )
+        )
+        errors = homework.ERRORS.value('APIResponseError')
+        attempts = homework.API_LATENCY.count()
+
+        try:
+            homework.get_api_answer(random_timestamp)
+        except homework.APIResponseError:
+            pass
+
+        assert homework.ERRORS.value('APIResponseError') == errors + 1
+        assert homework.API_LATENCY.count() == attempts + 1
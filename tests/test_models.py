@@ -0,0 +1,59 @@
+import pytest
+
+
+class TestModels:
+    def test_homework_keeps_only_used_fields(self):
+        from models import Homework
+        homework = Homework.from_dict({
+            'id': 1,
+            'homework_name': 'hw.zip',
+            'status': 'approved',
+            'date_updated': '2024-01-01T00:00:00Z',
+            'reviewer_comment': 'Принято!',
+            'lesson_name': 'Проект'
+        })
+
+        assert (homework.id, homework.homework_name, homework.status) == (
+            1, 'hw.zip', 'approved'
+        )
+        assert not hasattr(homework, '__dict__')
+        assert not hasattr(homework, 'reviewer_comment')
+
+    def test_key_falls_back_to_name(self):
+        from models import Homework
+        assert Homework('hw.zip', 'approved', 7).key == 7
+        assert Homework('hw.zip', 'approved').key == 'hw.zip'
+
+    @pytest.mark.parametrize('data, error', [
+        ({'status': 'approved'}, ValueError),
+        ({'homework_name': 'hw.zip'}, ValueError),
+        (['hw.zip'], TypeError),
+    ])
+    def test_invalid_homework(self, data, error):
+        from models import Homework
+        with pytest.raises(error):
+            Homework.from_dict(data)
+
+    @pytest.mark.parametrize('data, error', [
+        ([], TypeError),
+        ({'current_date': 1}, KeyError),
+        ({'homeworks': {}}, TypeError),
+        ({'homeworks': [{'status': 'approved'}]}, ValueError),
+    ])
+    def test_invalid_response(self, data, error):
+        from models import ApiResponse
+        with pytest.raises(error):
+            ApiResponse.from_dict(data)
+
+    def test_check_response_returns_models(self):
+        import homework
+        from models import Homework
+        homeworks = homework.check_response({
+            'homeworks': [{'homework_name': 'hw.zip', 'status': 'approved'}],
+            'current_date': 1
+        })
+
+        assert isinstance(homeworks[0], Homework)
+        assert homework.parse_status(homeworks[0]).startswith(
+            'Изменился статус проверки работы "hw.zip"'
+        )
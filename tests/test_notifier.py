@@ -0,0 +1,127 @@
+import threading
+
+from clock import VirtualClock
+from exceptions import SendMessageError
+
+
+class TooManyRequests(Exception):
+    error_code = 429
+    result_json = {'parameters': {'retry_after': 7}}
+
+
+def raise_429():
+    try:
+        raise TooManyRequests()
+    except TooManyRequests as e:
+        raise SendMessageError('429') from e
+
+
+class TestTokenBucket:
+    def test_reserve_returns_wait_time(self):
+        from notifier import TokenBucket
+        clock = VirtualClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock.monotonic)
+        assert [bucket.reserve() for _ in range(4)] == [0, 0, 0.5, 1.0]
+        clock.now = 10
+        assert bucket.reserve() == 0, 'Токены должны восстанавливаться.'
+
+
+class TestNotifier:
+    def make(self, send, **kwargs):
+        from notifier import Notifier
+        clock = VirtualClock()
+        notifier = Notifier(
+            send, sleep=clock.sleep, clock=clock.monotonic, **kwargs
+        )
+        return notifier, clock
+
+    def test_keeps_order_within_chat(self):
+        sent = []
+        notifier, _ = self.make(
+            lambda chat, text: sent.append((chat, text)), workers=3
+        )
+        notifier.start()
+        for number in range(20):
+            notifier.submit(number % 2, number)
+        notifier.join()
+        notifier.close(1)
+
+        for chat in (0, 1):
+            texts = [text for sent_chat, text in sent if sent_chat == chat]
+            assert texts == sorted(texts), (
+                'Сообщения одного чата должны уходить по порядку.'
+            )
+        assert notifier.sent == 20
+
+    def test_per_chat_rate_limit(self):
+        notifier, clock = self.make(
+            lambda chat, text: None, workers=1, chat_rate=1, global_rate=100
+        )
+        notifier.start()
+        for number in range(5):
+            notifier.submit('chat', number)
+        notifier.join()
+        assert clock.now >= 4, 'Лимит чата: не больше сообщения в секунду.'
+
+    def test_busy_chat_does_not_block_others(self):
+        sent = []
+        notifier, clock = self.make(
+            lambda chat, text: sent.append((chat, clock.now)),
+            workers=1, chat_rate=1, global_rate=100
+        )
+        for number in range(5):
+            notifier.submit('busy', number)
+        notifier.submit('other', 'text')
+        notifier.start()
+        notifier.join()
+
+        assert dict(sent)['other'] < 1, (
+            'Лимит одного чата не должен задерживать другие чаты.'
+        )
+        assert clock.now >= 4
+
+    def test_waits_retry_after_on_429(self):
+        calls = []
+
+        def send(chat, text):
+            calls.append(text)
+            if len(calls) == 1:
+                raise_429()
+
+        notifier, clock = self.make(send, workers=1)
+        notifier.start()
+        notifier.submit(1, 'text')
+        notifier.join()
+
+        assert calls == ['text', 'text']
+        assert clock.now >= 7, 'После 429 нужно выждать retry_after.'
+
+    def test_errors_are_reported_asynchronously(self):
+        errors = []
+        reported = threading.Event()
+
+        def on_error(chat, text, error, message_id):
+            errors.append(error)
+            reported.set()
+
+        def send(chat, text):
+            raise SendMessageError('down')
+
+        notifier, _ = self.make(send, workers=1, on_error=on_error)
+        notifier.start()
+        notifier.submit(1, 'text')
+
+        assert reported.wait(1)
+        assert isinstance(errors[0], SendMessageError)
+        assert notifier.failed == 1
+
+    def test_full_queue_raises(self):
+        notifier, _ = self.make(lambda chat, text: None, queue_size=1,
+                                workers=1)
+        notifier.submit(1, 'first')
+        try:
+            notifier.submit(1, 'second')
+        except SendMessageError:
+            pass
+        else:
+            raise AssertionError('Переполнение очереди должно быть видно.')
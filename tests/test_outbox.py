@@ -0,0 +1,183 @@
+from clock import VirtualClock
+from exceptions import SendMessageError
+
+
+def make_outbox(path=':memory:', **kwargs):
+    from outbox import Outbox
+    clock = VirtualClock(1000)
+    return Outbox(str(path), clock=clock.time, **kwargs), clock
+
+
+class TestOutbox:
+    def test_messages_survive_restart(self, tmp_path):
+        path = tmp_path / 'outbox.db'
+        outbox, _ = make_outbox(path)
+        outbox.add(1, 'first')
+        outbox.add(1, 'second')
+        outbox.close()
+
+        sent = []
+        restarted, _ = make_outbox(path)
+        assert restarted.deliver(lambda chat, text: sent.append(text)) == (
+            2, 0
+        )
+        assert sent == ['first', 'second'], (
+            'Сохраненные сообщения должны уйти после перезапуска по порядку.'
+        )
+
+    def test_failed_message_is_retried_with_backoff(self):
+        outbox, clock = make_outbox(retry_delay=10, max_retry_delay=25)
+
+        def fail(chat, text):
+            raise SendMessageError('down')
+
+        outbox.add(1, 'text')
+        assert outbox.deliver(fail) == (0, 1)
+        assert outbox.deliver(fail) == (0, 0), 'Повтор раньше паузы.'
+        clock.now += 10
+        assert outbox.deliver(fail) == (0, 1)
+        clock.now += 19
+        assert outbox.deliver(fail) == (0, 0)
+        clock.now += 1
+        assert outbox.deliver(fail) == (0, 1)
+        clock.now += 25
+        assert outbox.deliver(lambda chat, text: None) == (1, 0), (
+            'Пауза не должна превышать max_retry_delay.'
+        )
+
+    def test_backoff_does_not_overflow(self):
+        outbox, clock = make_outbox(retry_delay=30, max_retry_delay=3600)
+        message_id = outbox.add(1, 'a')
+
+        for _ in range(70):
+            outbox.fail(message_id)
+
+        assert outbox.claim() == []
+        clock.now += 3599
+        assert outbox.claim() == [], (
+            'Пауза после многих неудач должна оставаться max_retry_delay.'
+        )
+        clock.now += 1
+        assert len(outbox.claim()) == 1
+
+    def test_gives_up_after_max_attempts(self):
+        outbox, _ = make_outbox(max_attempts=3)
+        message_id = outbox.add(1, 'a')
+
+        assert [outbox.fail(message_id) for _ in range(3)] == [
+            False, False, True
+        ]
+        assert outbox.pending() == 0
+        assert outbox.dead() == 1
+
+    def test_permanent_refusal_is_not_retried(self):
+        class Forbidden(Exception):
+            error_code = 403
+
+        def blocked(chat, text):
+            try:
+                raise Forbidden()
+            except Forbidden as error:
+                raise SendMessageError('blocked') from error
+
+        outbox, clock = make_outbox()
+        outbox.add(1, 'a')
+
+        assert outbox.deliver(blocked) == (0, 1)
+        clock.now += 3600
+        assert outbox.claim() == [], 'Отказ 403 не исправится повтором.'
+        assert outbox.dead() == 1
+
+    def test_failure_blocks_rest_of_chat(self):
+        outbox, _ = make_outbox()
+        outbox.add(1, 'a')
+        outbox.add(1, 'b')
+        outbox.add(2, 'c')
+        sent = []
+
+        def send(chat, text):
+            if text == 'a':
+                raise SendMessageError('down')
+            sent.append(text)
+
+        assert outbox.deliver(send) == (1, 1)
+        assert sent == ['c'], 'Порядок сообщений в чате нарушен.'
+
+    def test_claim_leases_messages(self):
+        outbox, clock = make_outbox()
+        outbox.add(1, 'a', lease=60)
+        assert outbox.claim() == []
+        clock.now += 60
+        assert len(outbox.claim(lease=30)) == 1
+        assert outbox.claim() == [], 'Выданное сообщение не выдается снова.'
+
+    def test_compact_removes_delivered(self):
+        outbox, _ = make_outbox()
+        outbox.add(1, 'a')
+        outbox.add(1, 'b')
+        outbox.deliver(lambda chat, text: None, limit=1)
+        assert outbox.compact() == 1
+        assert outbox.pending() == 1
+
+    def test_add_many_fans_out_one_message(self):
+        outbox, _ = make_outbox()
+        ids = outbox.add_many([1, 2, 3], 'статус')
+        sent = []
+
+        outbox.deliver(lambda chat, text: sent.append((chat, text)))
+
+        assert len(set(ids)) == 3
+        assert sent == [('1', 'статус'), ('2', 'статус'), ('3', 'статус')]
+
+
+class TestMainLoop:
+    def test_outbox_error_does_not_stop_bot(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        import inspect
+        import sqlite3
+        import time
+
+        import requests
+        import telebot
+
+        import tests.check_utils as check_utils
+        from outbox import Outbox
+
+        class StopLoop(Exception):
+            pass
+
+        class LockedOutbox(Outbox):
+            def deliver(self, *args, **kwargs):
+                if not delays:
+                    raise sqlite3.OperationalError('database is locked')
+                return super().deliver(*args, **kwargs)
+
+        def sleep(delay):
+            delays.append(delay)
+            if len(delays) == 2:
+                raise StopLoop
+
+        delays = []
+        monkeypatch.setattr(
+            telebot, 'TeleBot',
+            lambda *args, **kwargs: check_utils.MockTelegramBot()
+        )
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=random_timestamp
+            )
+        )
+        monkeypatch.setattr(homework_module, 'open_outbox', LockedOutbox)
+        monkeypatch.setattr(time, 'sleep', sleep)
+
+        try:
+            # test_bot оборачивает main() проверкой time.sleep()
+            inspect.unwrap(homework_module.main)()
+        except StopLoop:
+            pass
+
+        assert len(delays) == 2, (
+            'Сбой журнала сообщений не должен останавливать бота.'
+        )
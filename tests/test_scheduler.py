@@ -0,0 +1,214 @@
+import threading
+import time
+
+
+class TestAdaptiveInterval:
+    def make(self, floor=60, ceiling=600):
+        from scheduler import AdaptiveInterval
+        return AdaptiveInterval(floor, ceiling)
+
+    def test_backs_off_while_nothing_changes(self):
+        interval = self.make()
+        delays = [interval.update([]) for _ in range(6)]
+        assert delays == [120, 240, 480, 600, 600, 600], (
+            'Без изменений пауза должна расти до потолка.'
+        )
+
+    def test_backs_off_on_errors(self):
+        interval = self.make()
+        assert interval.update(None) == 120
+        assert interval.update(None) == 240
+
+    def test_polls_fast_while_reviewing(self):
+        from models import Homework
+        interval = self.make()
+        interval.update([])
+        reviewing = [Homework('hw', 'reviewing')]
+        assert interval.update(reviewing) == 60
+        assert interval.update([]) == 60, (
+            'Пока работа на проверке, пауза должна быть минимальной.'
+        )
+        approved = [Homework('hw', 'approved')]
+        assert interval.update(approved) == 60
+        assert interval.update([]) == 120
+
+    def test_constant_when_floor_equals_ceiling(self):
+        from models import Homework
+        interval = self.make(600, 600)
+        homeworks = [Homework('hw', 'approved')]
+        assert {interval.update(x) for x in ([], None, homeworks)} == {600}
+
+    def test_floor_above_ceiling(self):
+        try:
+            self.make(10, 5)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('Ожидалась ошибка ValueError.')
+
+
+class TestDeadlineScheduler:
+    def start(self, task, workers=2):
+        from scheduler import DeadlineScheduler
+        scheduler = DeadlineScheduler(task, workers)
+        thread = threading.Thread(target=scheduler.run, daemon=True)
+        return scheduler, thread
+
+    def test_runs_items_in_deadline_order(self):
+        done = []
+        finished = threading.Event()
+
+        def task(item):
+            done.append(item)
+            if len(done) == 3:
+                finished.set()
+            return 60
+
+        scheduler, thread = self.start(task, workers=1)
+        now = time.monotonic()
+        scheduler.schedule('c', now + 0.06)
+        scheduler.schedule('a', now + 0.02)
+        scheduler.schedule('b', now + 0.04)
+        thread.start()
+
+        assert finished.wait(1)
+        scheduler.stop()
+        thread.join(1)
+        assert done == ['a', 'b', 'c'], (
+            'Элементы должны запускаться в порядке сроков.'
+        )
+        assert len(scheduler) == 3, 'Элементы должны вернуться в кучу.'
+
+    def test_reschedules_with_returned_delay(self):
+        runs = []
+        finished = threading.Event()
+
+        def task(item):
+            runs.append(time.monotonic())
+            if len(runs) == 3:
+                finished.set()
+            return 0.05
+
+        scheduler, thread = self.start(task)
+        scheduler.schedule_evenly(['a'], period=1)
+        thread.start()
+
+        assert finished.wait(1)
+        scheduler.stop()
+        thread.join(1)
+        assert runs[2] - runs[1] >= 0.045
+
+    def test_lag_includes_wait_for_busy_pool(self):
+        from scheduler import DeadlineScheduler
+        lags = []
+        finished = threading.Event()
+
+        def task(item):
+            time.sleep(0.1)
+            if item == 'b':
+                finished.set()
+            return 60
+
+        scheduler = DeadlineScheduler(task, 1, on_lag=lags.append)
+        thread = threading.Thread(target=scheduler.run, daemon=True)
+        now = time.monotonic()
+        scheduler.schedule('a', now)
+        scheduler.schedule('b', now)
+        thread.start()
+
+        assert finished.wait(1)
+        scheduler.stop()
+        thread.join(1)
+        assert lags[1] >= 0.09, (
+            'Ожидание свободного потока должно входить в опоздание.'
+        )
+
+    def test_failed_task_is_rescheduled(self):
+        from scheduler import DeadlineScheduler
+        runs = []
+        errors = []
+        finished = threading.Event()
+
+        def task(item):
+            runs.append(item)
+            if len(runs) == 2:
+                finished.set()
+            raise ValueError('database is locked')
+
+        scheduler = DeadlineScheduler(
+            task, 1, on_error=lambda item, error: errors.append(item),
+            error_delay=0.02
+        )
+        thread = threading.Thread(target=scheduler.run, daemon=True)
+        scheduler.schedule('a', time.monotonic())
+        thread.start()
+
+        assert finished.wait(1), 'Элемент должен вернуться в кучу.'
+        scheduler.stop()
+        thread.join(1)
+        assert errors[:1] == ['a']
+
+    def test_schedule_evenly_spreads_deadlines(self):
+        from scheduler import DeadlineScheduler
+        scheduler = DeadlineScheduler(lambda item: 0, 1)
+        scheduler.schedule_evenly(range(10), period=100)
+        deadlines = sorted(due for due, _, _ in scheduler.heap)
+        steps = {
+            round(later - earlier, 6)
+            for earlier, later in zip(deadlines, deadlines[1:])
+        }
+        assert steps == {10.0}
+
+
+class TestVirtualTime:
+    def test_virtual_clock_sleep_advances_time(self):
+        from clock import VirtualClock
+        clock = VirtualClock(100)
+        clock.sleep(50)
+        clock.sleep(-5)
+        assert clock.time() == clock.monotonic() == 150
+
+    def test_run_inline_simulates_a_week(self):
+        from clock import VirtualClock
+        from scheduler import DeadlineScheduler
+        clock = VirtualClock()
+        runs = []
+
+        def task(item):
+            runs.append((item, clock.time()))
+            return 600
+
+        scheduler = DeadlineScheduler(
+            task, 1, clock=clock.monotonic, sleep=clock.sleep
+        )
+        scheduler.schedule_evenly(['a', 'b'], 600)
+        week = 7 * 24 * 3600
+
+        executed = scheduler.run_inline(until=week)
+
+        assert executed == len(runs) == 2 * week // 600 + 1, (
+            'За неделю каждый элемент должен запускаться раз в 600 с.'
+        )
+        assert runs[1] == ('b', 300)
+        assert clock.time() <= week
+
+    def test_retry_sleeps_on_injected_clock(
+            self, monkeypatch, homework_module
+    ):
+        import requests
+        from clock import VirtualClock
+        clock = VirtualClock()
+        monkeypatch.setattr(homework_module, 'CLOCK', clock)
+
+        def fail(*args, **kwargs):
+            raise requests.ConnectionError('down')
+
+        monkeypatch.setattr(requests, 'get', fail)
+        started = time.monotonic()
+        try:
+            homework_module.get_api_answer(0)
+        except homework_module.ApiRequestException:
+            pass
+        assert time.monotonic() - started < 0.1, (
+            'С виртуальными часами повторы не должны ждать по-настоящему.'
+        )
@@ -0,0 +1,149 @@
+import inspect
+import os
+import signal
+import threading
+import time
+
+import requests
+import telebot
+
+import tests.check_utils as check_utils
+from tests.test_engine import RecordingBot, mock_api
+
+
+def send_signal_later(delay=0.2, signum=signal.SIGTERM):
+    timer = threading.Timer(delay, os.kill, (os.getpid(), signum))
+    timer.start()
+    return timer
+
+
+class TestGracefulShutdown:
+    def test_signal_interrupts_wait(self):
+        from exceptions import ShutdownRequested
+        from shutdown import GracefulShutdown
+        started = time.monotonic()
+        with GracefulShutdown() as shutdown:
+            send_signal_later(0.1)
+            try:
+                with shutdown.interruptible():
+                    time.sleep(5)
+            except ShutdownRequested:
+                pass
+            else:
+                raise AssertionError('Сигнал должен прерывать ожидание.')
+        assert time.monotonic() - started < 1
+        assert shutdown.signum == signal.SIGTERM
+
+    def test_signal_outside_wait_only_sets_flag(self):
+        from exceptions import ShutdownRequested
+        from shutdown import GracefulShutdown
+        previous = signal.getsignal(signal.SIGTERM)
+        with GracefulShutdown() as shutdown:
+            os.kill(os.getpid(), signal.SIGTERM)
+            time.sleep(0.05)
+            assert shutdown.is_set()
+            try:
+                with shutdown.interruptible():
+                    time.sleep(5)
+            except ShutdownRequested:
+                pass
+            else:
+                raise AssertionError(
+                    'После сигнала ожидание не должно начинаться.'
+                )
+        assert signal.getsignal(signal.SIGTERM) is previous, (
+            'Прежний обработчик сигнала должен восстанавливаться.'
+        )
+
+    def test_second_signal_is_not_reported_as_error(
+            self, monkeypatch, homework_module
+    ):
+        from exceptions import ShutdownRequested
+
+        def interrupted_get(*args, **kwargs):
+            raise ShutdownRequested('Получен сигнал SIGTERM')
+
+        monkeypatch.setattr(requests, 'get', interrupted_get)
+        tenant = homework_module.Tenant('token', 1, 0)
+        sent = []
+        try:
+            homework_module.poll_tenant(tenant, sent.append)
+        except ShutdownRequested:
+            pass
+        else:
+            raise AssertionError('Сигнал должен прерывать опрос.')
+        assert sent == [], 'Остановка не должна сообщаться как сбой.'
+
+    def test_run_with_timeout_is_bounded(self):
+        from shutdown import run_with_timeout
+        started = time.monotonic()
+        assert not run_with_timeout(time.sleep, 0.05, 5)
+        assert run_with_timeout(time.sleep, 1, 0)
+        assert time.monotonic() - started < 1
+
+
+class TestMainShutdown:
+    def test_main_stops_on_sigterm(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status,
+            homework_module
+    ):
+        bot = RecordingBot()
+        monkeypatch.setattr(telebot, 'TeleBot', lambda *args, **kwargs: bot)
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                data=data_with_new_hw_status
+            )
+        )
+        started = time.monotonic()
+        send_signal_later(0.3)
+
+        # test_bot оборачивает main() проверкой time.sleep()
+        inspect.unwrap(homework_module.main)()
+
+        assert time.monotonic() - started < 1.5, (
+            'После SIGTERM бот должен выходить, не дожидаясь RETRY_PERIOD.'
+        )
+        assert len(bot.sent) == 1
+
+    def test_stop_bot_keeps_undelivered_messages(self, homework_module):
+        from outbox import Outbox
+        from state import StateStore
+
+        class SlowBot:
+            def send_message(self, chat_id=None, text=None):
+                time.sleep(5)
+
+        outbox = Outbox(':memory:')
+        outbox.add('1', 'text')
+        started = time.monotonic()
+
+        homework_module.stop_bot(SlowBot(), StateStore(':memory:'), outbox,
+                                 timeout=0.1)
+
+        assert time.monotonic() - started < 1
+        assert outbox.pending() == 1, (
+            'Недоставленное сообщение должно остаться в журнале.'
+        )
+
+
+class TestEngineShutdown:
+    def test_engine_drains_and_exits(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import engine
+        import tenants
+        mock_api(monkeypatch, {'a': data_with_new_hw_status}, random_timestamp)
+        bot = RecordingBot()
+        polling_engine = engine.PollingEngine(
+            bot, [tenants.Tenant('a', 1, 0)], workers=1
+        )
+        started = time.monotonic()
+        send_signal_later(0.3)
+
+        polling_engine.run()
+
+        assert time.monotonic() - started < 1.5
+        assert bot.sent, 'Первый опрос должен пройти сразу после запуска.'
+        assert polling_engine.scheduler.running is False
@@ -0,0 +1,115 @@
+import sqlite3
+
+
+def make_store(path, **kwargs):
+    from state import StateStore
+    return StateStore(str(path), **kwargs)
+
+
+class TestStateStore:
+    def test_restore_after_restart(self, tmp_path):
+        from tenants import Tenant
+        path = tmp_path / 'state.db'
+        store = make_store(path)
+        tenant = Tenant('token', 1, from_date=100, last_message='Привет')
+        store.save(tenant)
+        store.close()
+
+        restarted = Tenant('token', 1)
+        other = Tenant('other', 2, from_date=5)
+        restored = make_store(path).restore([restarted, other])
+
+        assert restored == 1
+        assert restarted.from_date == 100, (
+            'После перезапуска опрос должен продолжаться с сохраненной метки.'
+        )
+        assert restarted.last_message == 'Привет'
+        assert other.from_date == 5
+
+    def test_writes_are_batched(self, tmp_path):
+        from tenants import Tenant
+        path = tmp_path / 'state.db'
+        store = make_store(path, flush_every=3, flush_interval=3600)
+
+        def stored_rows():
+            connection = sqlite3.connect(path)
+            try:
+                return connection.execute(
+                    'SELECT COUNT(*) FROM state'
+                ).fetchone()[0]
+            finally:
+                connection.close()
+
+        store.save(Tenant('a', 1, 1))
+        store.save(Tenant('b', 2, 1))
+        assert stored_rows() == 0, 'Записи должны копиться до сброса.'
+        store.save(Tenant('c', 3, 1))
+        assert stored_rows() == 3
+
+    def test_unknown_synchronous_mode(self, tmp_path):
+        try:
+            make_store(tmp_path / 'state.db', synchronous='SOMETIMES')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('Ожидалась ошибка ValueError.')
+
+
+class TestHomeworkIndex:
+    def homework(self, id, status, date):
+        from models import Homework
+        return Homework(f'hw{id}', status, id, date)
+
+    def test_changes_in_chronological_order(self):
+        from state import HomeworkIndex
+        index = HomeworkIndex()
+        response = [
+            self.homework(3, 'approved', '2024-01-03T00:00:00Z'),
+            self.homework(2, 'rejected', '2024-01-02T00:00:00Z'),
+            self.homework(1, 'reviewing', '2024-01-01T00:00:00Z'),
+        ]
+        assert [hw.id for hw in index.changes(response)] == [1, 2, 3]
+        shuffled = [response[1], response[0], response[2]]
+        assert [hw.id for hw in index.changes(shuffled)] == [1, 2, 3]
+
+    def test_only_real_transitions(self):
+        from state import HomeworkIndex
+        index = HomeworkIndex()
+        first = self.homework(1, 'reviewing', '2024-01-01T00:00:00Z')
+        index.record(first)
+        assert index.changes([first]) == [], (
+            'Уже известный статус не должен считаться изменением.'
+        )
+        approved = self.homework(1, 'approved', '2024-01-02T00:00:00Z')
+        assert index.changes([approved]) == [approved]
+        assert len(index) == 1
+
+
+class TestPollEveryHomework:
+    def test_main_loop_sends_each_transition(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        import requests
+        import tests.check_utils as check_utils
+        from tenants import Tenant
+        data = {
+            'homeworks': [
+                {'id': 2, 'homework_name': 'b', 'status': 'approved',
+                 'date_updated': '2024-01-02T00:00:00Z'},
+                {'id': 1, 'homework_name': 'a', 'status': 'rejected',
+                 'date_updated': '2024-01-01T00:00:00Z'},
+            ],
+            'current_date': random_timestamp
+        }
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(data=data)
+        )
+        sent = []
+        tenant = Tenant('token', 1, 0)
+
+        homework_module.poll_tenant(tenant, sent.append)
+        homework_module.poll_tenant(tenant, sent.append)
+
+        assert len(sent) == 2, 'Каждый переход должен уйти ровно один раз.'
+        assert '"a"' in sent[0] and '"b"' in sent[1]
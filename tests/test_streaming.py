@@ -0,0 +1,91 @@
+import json
+import tracemalloc
+
+import pytest
+
+from tests.fixtures.streaming import chunked, mock_stream_api
+
+RESPONSE = {
+    'homeworks': [
+        {'id': 2, 'homework_name': 'Работа «два»', 'status': 'approved',
+         'date_updated': '2024-01-02T00:00:00Z'},
+        {'id': 1, 'homework_name': 'hw1.zip', 'status': 'reviewing',
+         'reviewer_comment': {'вложенный': [1, 2, {'ключ': None}]},
+         'date_updated': '2024-01-01T00:00:00Z'},
+    ],
+    'current_date': 1700000000
+}
+
+
+class TestHomeworkStream:
+    @pytest.mark.parametrize('size', [1, 2, 7, 4096])
+    def test_items_across_chunk_boundaries(self, size):
+        from streaming import HomeworkStream
+        stream = HomeworkStream(chunked(RESPONSE, size))
+
+        homeworks = list(stream)
+
+        assert [hw.homework_name for hw in homeworks] == [
+            'Работа «два»', 'hw1.zip'
+        ]
+        assert stream.get('current_date') == 1700000000
+
+    @pytest.mark.parametrize('data, error', [
+        ([], TypeError),
+        ({'current_date': 1}, KeyError),
+        ({'homeworks': {}}, TypeError),
+        ({'homeworks': [{'status': 'approved'}]}, ValueError),
+    ])
+    def test_same_errors_as_check_response(self, data, error):
+        from streaming import HomeworkStream
+        with pytest.raises(error):
+            list(HomeworkStream(chunked(data, 3)))
+
+    def test_truncated_body(self):
+        from streaming import HomeworkStream
+        with pytest.raises(ValueError):
+            list(HomeworkStream(chunked(RESPONSE, 5)[:-3]))
+
+    def test_memory_does_not_grow_with_response(self):
+        from streaming import HomeworkStream
+        item = json.dumps({
+            'homework_name': 'hw.zip', 'status': 'approved',
+            'reviewer_comment': 'x' * 1000
+        }).encode()
+
+        def body(count):
+            yield b'{"homeworks": ['
+            for number in range(count):
+                yield item + (b',' if number < count - 1 else b'')
+            yield b'], "current_date": 1}'
+
+        tracemalloc.start()
+        try:
+            count = sum(1 for _ in HomeworkStream(body(5000)))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert count == 5000
+        assert peak < 200_000, (
+            'Память должна зависеть от размера работы, а не ответа.'
+        )
+
+
+class TestStreamingPoll:
+    def test_poll_tenant_streams_transitions(self, monkeypatch):
+        import homework
+        from tenants import Tenant
+        mock_stream_api(monkeypatch, lambda params: RESPONSE)
+        sent = []
+        tenant = Tenant('token', 1, 0)
+
+        homeworks = homework.poll_tenant(tenant, sent.append, stream=True)
+        homework.poll_tenant(tenant, sent.append, stream=True)
+
+        assert len(sent) == 2
+        assert sent[0].startswith(
+            'Изменился статус проверки работы "hw1.zip"'
+        ), 'Сообщения должны идти от старых изменений к новым.'
+        assert [hw.id for hw in homeworks] == [2, 1]
+        assert tenant.from_date == 1700000000